@@ -6,12 +6,16 @@ from pygame import Vector2
 from controllers.AnimationController import AnimationController
 from controllers.EdgeLengthUpdateController import EdgeLengthUpdateController
 from controllers.EdgeManager import EdgeManager
+from controllers.FrameScheduler import FrameScheduler
 from controllers.NodePositionUpdateController import NodePositionUpdateController
+from controllers.RenderScheduler import RenderScheduler
+from controllers.SpatialIndex import SpatialIndex
+from rbt.RbtTimeline import Timeline
 from rbt.RedBlackVisualizedTree import RedBlackVisualizedTree
-from utility.enums import Color, Operation
+from utility.enums import Color, Detail, Operation
 from utility.pygame_text_input_master.pygame_textinput import pygame_textinput, TextInputManager
 
-from utility.gui import Button, drawTextWithOutline
+from utility.gui import Button, drawLine, drawTextWithOutline
 
 
 class Visualizer:
@@ -19,6 +23,15 @@ class Visualizer:
     def __init__(self):
         # Config
         self.tps_max = 60.0
+        self.fps_max = 60.0
+        self.interpolate_frames = True  # sample the animations between ticks for frames drawn in between
+        self.time_scale = 1.0  # animation speed, changed with , and . between min and max
+        self.min_time_scale = 0.125
+        self.max_time_scale = 16.0
+        # Level of detail: node radius in pixels below which values, node shapes and single nodes are no longer
+        # drawn, and the width in pixels of the subtrees collapsed into one glyph at the lowest level
+        self.detail_radii = (6.0, 2.5, 1.0)
+        self.subtree_width = 8
 
         # Initialization
         pygame.init()
@@ -26,17 +39,20 @@ class Visualizer:
         pygame.display.set_caption("Red-black tree visualization")
         pygame.display.set_icon(pygame.image.load('assets/icon.png'))
         self.screen = pygame.display.set_mode((1920, 1080))
-        self.tps_clock = pygame.time.Clock()
-        self.tps_delta = 0.0
+        self.frame_scheduler = FrameScheduler(self)
 
         self.x_offset = 0
         self.y_offset = 0
         self.zoom = 1.0
 
+        self.render_scheduler = RenderScheduler(self)
+        self.node_index = SpatialIndex()  # nodes on the screen or flying off it, by position
+        self.edge_index = SpatialIndex()
         self.node_position_update_controller = NodePositionUpdateController()
         self.edge_length_update_controller = EdgeLengthUpdateController()
         self.animation_controller = AnimationController(self)
         self.tree = RedBlackVisualizedTree(self)
+        self.timeline = Timeline(self.tree)
         self.edge_manager = EdgeManager(self)
 
         self.text_input = pygame_textinput.TextInputVisualizer(
@@ -65,6 +81,8 @@ class Visualizer:
                 if (event.type == pygame.QUIT or
                         (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE)):
                     sys.exit(0)
+                elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    self.render_scheduler.invalidate()
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_RETURN:
                         self.check_for_value_add()
@@ -74,7 +92,17 @@ class Visualizer:
                     if event.key == pygame.K_c:
                         self.animation_controller.add_animated_element((Operation.CHANGE_COLOR, None, 20))
                     if event.key == pygame.K_b:
-                        self.tree.bfs_reposition()
+                        self.tree.reposition(full=True)
+                    if event.key == pygame.K_f:
+                        self.animation_controller.fast_forward()
+                    if event.key == pygame.K_z:
+                        self.timeline.undo()
+                    if event.key == pygame.K_y:
+                        self.timeline.redo()
+                    if event.key == pygame.K_PERIOD:
+                        self.time_scale = min(self.time_scale * 2, self.max_time_scale)
+                    if event.key == pygame.K_COMMA:
+                        self.time_scale = max(self.time_scale / 2, self.min_time_scale)
                     if event.key == pygame.K_SPACE:
                         self.x_offset = 0
                         self.y_offset = 0
@@ -98,10 +126,8 @@ class Visualizer:
 
                 elif event.type == pygame.MOUSEBUTTONDOWN and self.animation_controller.idle():
                     if event.button == 1:
-                        nodes = self.tree.get_nodes()
-                        for node in nodes:
-                            if Vector2(node.get_transformed_position()).distance_to(Vector2(mouse_pos)) < node.radius:
-                                self.tree.delete_all(node)
+                        for node in self.pick_nodes(mouse_pos):
+                            self.tree.delete_all(node)
 
                         if self.add_value_button.rect.collidepoint(mouse_pos):
                             self.check_for_value_add()
@@ -109,24 +135,30 @@ class Visualizer:
             # Update text_input
             self.text_input.update(events)
 
-            # Ticking
-            self.tps_delta += self.tps_clock.tick() / 1000.0
-            while self.tps_delta > 1 / self.tps_max:
-                self.tps_delta -= 1 / self.tps_max
+            # Ticking at a fixed rate, under load with frames skipped rather than ticks piling up
+            for _ in range(self.frame_scheduler.ticks()):
                 self.tick()
 
-            # Rendering
-            self.screen.fill(Color.LIGHT_BLUE.value)
-            self.draw()
-            pygame.display.update()
+            # Rendering at most fps_max times per second, only the parts of the screen that changed and nothing at
+            # all while the picture stays still
+            if self.frame_scheduler.frame_due():
+                if self.interpolate_frames:
+                    ahead = self.frame_scheduler.alpha() * self.time_scale / self.tps_max
+                    self.node_position_update_controller.sample(ahead)
+                    self.edge_length_update_controller.sample(ahead)
+                rects = self.render_scheduler.plan()
+                if rects:
+                    self.render(rects)
+                    pygame.display.update(rects)
 
-            await asyncio.sleep(0)
+            # Sleeping until there is work again also hands control back to the browser in the pygbag build
+            await asyncio.sleep(self.frame_scheduler.wait())
 
     def tick(self):
         self.tree.update()
-        self.node_position_update_controller.update()
-        self.animation_controller.update()
-        self.edge_length_update_controller.update()
+        self.node_position_update_controller.update(self.time_scale / self.tps_max)
+        self.animation_controller.update(self.time_scale * 60 / self.tps_max)  # op lengths are in 60ths of a second
+        self.edge_length_update_controller.update(self.time_scale / self.tps_max)
         self.edge_manager.update()
 
         # Checking inputs
@@ -154,22 +186,39 @@ class Visualizer:
         if keys[pygame.K_DOWN]:
             self.y_offset -= min(max(int(10 * 1 / self.zoom), 10), 100) / (self.tps_max / 60)
 
-    def draw(self):
-        if self.animation_controller.idle():  #debug
-            self.tps_max = 60.0
+    def render(self, rects):
+        border = 2 * self.render_scheduler.border
+        for rect in rects:
+            rect = rect.inflate(border, border)
+            self.screen.set_clip(rect)
+            self.screen.fill(Color.LIGHT_BLUE.value)
+            self.draw(rect)
+        self.screen.set_clip(None)
+
+    def draw(self, rect=None):
+        view_box = self.get_view_box(rect)
+        detail = self.get_detail()
+        if detail is Detail.SUBTREES:
+            newly_added_nodes = []
+            self.draw_subtrees(view_box)
+        else:
+            # Visible nodes only, deleted ones at the bottom, then the new ones, then the rest from the deepest level up
+            nodes = self.node_index.query(view_box)
+            nodes.sort(key=lambda node: (
+                0 if node.being_deleted else 1 if node.recently_added else 2,
+                -node.dest_position[1], -node.dest_position[0], node.value
+            ))
+            newly_added_nodes = [node for node in nodes if node.recently_added and not node.being_deleted]
 
-        nodes = list(reversed(self.tree.get_nodes_bfs()))
-        nodes_being_deleted = list(self.tree.nodes_being_deleted)
-        newly_added_nodes = [node for node in nodes if node.recently_added]
-        old_nodes = [node for node in nodes if not node.recently_added]
-        nodes = nodes_being_deleted + newly_added_nodes + old_nodes
+            self.edge_manager.draw(view_box, detail)
 
-        self.edge_manager.draw()
+            node_blits = []
+            for node in nodes:
+                node_blits.extend(node.get_blits(detail))
+            self.screen.blits(node_blits, doreturn=False)
 
-        for node in nodes:
-            node.draw()
         self.add_value_button.draw()
-        self.screen.blit(self.text_input.surface, (200, self.screen.get_height() - 96))
+        self.screen.blit(self.text_input.surface, self.get_text_input_rect())
 
         # tmp
         if not self.animation_controller.idle():
@@ -179,12 +228,97 @@ class Visualizer:
         else:
             for new_node in newly_added_nodes:
                 new_node.recently_added = False
+                self.node_changed(new_node)
+
+    def draw_subtrees(self, view_box):
+        # Lowest level of detail: single pixels for nodes and a triangle for every narrow subtree, from its root
+        # down to the expected height, so the cost follows the screen size rather than the number of nodes
+        zoom, x_offset, y_offset = self.zoom, self.x_offset, self.y_offset
+        nil = self.tree.nil
+        node_blits = []
+        for node, box in self.tree.get_subtrees(view_box, self.subtree_width / zoom):
+            if box is None:
+                for child in (node.left, node.right):
+                    if child is not nil:
+                        drawLine(self, node.position, child.position)
+                node_blits.extend(node.get_blits(Detail.SUBTREES))
+            else:
+                x, y = node.position
+                pygame.draw.polygon(self.screen, Color.BLACK.value, [
+                    ((x + x_offset) * zoom, (y + y_offset) * zoom),
+                    ((box[0] + x_offset) * zoom, (box[3] + y_offset) * zoom),
+                    ((box[2] + x_offset) * zoom, (box[3] + y_offset) * zoom)
+                ])
+        for node in self.tree.nodes_being_deleted:
+            node_blits.extend(node.get_blits(Detail.SUBTREES))
+        self.screen.blits(node_blits, doreturn=False)
+
+    def get_detail(self):
+        radius = self.tree.nil.radius * self.zoom
+        full_radius, shape_radius, point_radius = self.detail_radii
+        if radius >= full_radius:
+            return Detail.FULL
+        elif radius >= shape_radius:
+            return Detail.SHAPES
+        elif radius >= point_radius:
+            return Detail.POINTS
+        return Detail.SUBTREES
+
+    def get_view_box(self, rect=None):  # part of the world on the screen, or under a rect of it
+        if rect is None:
+            rect = self.screen.get_rect()
+        rect = rect.inflate(4, 4)  # positions are truncated to whole pixels when drawn
+        return (rect.left / self.zoom - self.x_offset, rect.top / self.zoom - self.y_offset,
+                rect.right / self.zoom - self.x_offset, rect.bottom / self.zoom - self.y_offset)
+
+    def get_text_input_rect(self):
+        return self.text_input.surface.get_rect(topleft=(200, self.screen.get_height() - 96))
+
+    # Every change to what is drawn goes through these, to keep the spatial indexes and the dirty rects up to date
+
+    def node_moved(self, node):
+        mark_dirty = self.render_scheduler.mark_dirty
+        if not node.being_deleted or node in self.tree.nodes_being_deleted:
+            # dropped nodes are not drawn for the rest of their track
+            mark_dirty(self.node_index.get(node))
+            box = node.get_box()
+            self.node_index.update(node, box)
+            mark_dirty(box)
+        for edge in self.edge_manager.node_edges.get(node, ()):
+            mark_dirty(self.edge_index.get(edge))
+            box = edge.get_box()
+            self.edge_index.update(edge, box)
+            mark_dirty(box)
+
+    def node_changed(self, node):
+        self.render_scheduler.mark_dirty(self.node_index.get(node))
+
+    def node_removed(self, node):
+        self.render_scheduler.mark_dirty(self.node_index.get(node))
+        self.node_index.remove(node)
+
+    def edge_changed(self, edge):
+        self.render_scheduler.mark_dirty(self.edge_index.get(edge))
+
+    def pick_nodes(self, mouse_pos):
+        # A click counts within the node radius in screen pixels, as many world units as that takes at this zoom
+        reach = self.tree.nil.radius / self.zoom
+        x, y = mouse_pos[0] / self.zoom - self.x_offset, mouse_pos[1] / self.zoom - self.y_offset
+        return [
+            node for node in self.node_index.query((x - reach, y - reach, x + reach, y + reach))
+            if not node.being_deleted
+            and Vector2(node.get_transformed_position()).distance_to(Vector2(mouse_pos)) < node.radius
+        ]
 
     def restart(self):
+        self.render_scheduler.invalidate()
+        self.node_index = SpatialIndex()
+        self.edge_index = SpatialIndex()
         self.node_position_update_controller = NodePositionUpdateController()
         self.edge_length_update_controller = EdgeLengthUpdateController()
         self.animation_controller = AnimationController(self)
         self.tree = RedBlackVisualizedTree(self)
+        self.timeline = Timeline(self.tree)
         self.edge_manager = EdgeManager(self)
 
     def check_for_value_add(self):
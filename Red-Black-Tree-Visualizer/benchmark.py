@@ -0,0 +1,467 @@
+import os
+import random
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')  # no window is needed to measure drawing
+
+import pygame
+
+from controllers.AnimationController import AnimationController
+from controllers.EdgeManager import EdgeManager
+from controllers.NodePositionUpdateController import NodePositionUpdateController
+from controllers.PathGenerator import PathGenerator
+from controllers.TreeLayout import TreeLayout
+from rbt.PersistentRedBlackTree import PersistentRedBlackTree
+from rbt.RbtBaseNode import RbtBaseNode
+from rbt.RbtNode import RbtNode
+from rbt.RbtObserver import RbtObserver
+from rbt.RbtTimeline import Timeline
+from rbt.RbtTrace import TracePlayer, TraceRecorder
+from rbt.RedBlackTree import RedBlackTree
+from utility import gui
+from utility.enums import Color, Detail, Operation
+
+
+def build_tree(n, node_class=RbtNode, seed=0):
+    keys = list(range(n))
+    random.Random(seed).shuffle(keys)
+    tree = RedBlackTree(node_class=node_class)
+    tree.insert_iterable(keys)
+    return tree
+
+
+def timed(func, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_layout(sizes=(1_000, 10_000, 100_000)):
+    print('layout: full TreeLayout.apply pass')
+    for n in sizes:
+        tree = build_tree(n)
+        layout = TreeLayout((960, 100), 50)
+        layout.apply(tree)
+        for node in tree:  # force every dest_position to change again
+            node.dest_position = (0, 0)
+        seconds = timed(lambda: layout.apply(tree), repeat=1)
+        print(f'  n={n:>7}  {seconds * 1000:9.2f} ms  {seconds / n * 1e6:6.3f} us/node')
+
+
+class LayoutObserver(RbtObserver):
+    # Drives a TreeLayout the same way RedBlackVisualizedTree does, without any animations
+    def __init__(self, tree, layout):
+        self.tree = tree
+        self.layout = layout
+        self.moved = 0
+
+    def on_insert(self, node):
+        self.layout.insert(self.tree, node)
+
+    def on_rotate(self, node):
+        self.layout.mark_dirty(node)
+        self.moved += len(self.layout.update(self.tree))
+
+    def on_transplant(self, x, y):
+        if y is not self.tree.nil:
+            self.layout.mark_dirty(y)
+
+    def on_operation_end(self):
+        self.moved += len(self.layout.update(self.tree))
+
+
+def bench_incremental_layout(sizes=(1_000, 10_000, 100_000), operations=200):
+    print(f'layout: {operations} inserts + deletes on a tree of n nodes, full vs incremental')
+    for n in sizes:
+        for incremental in (False, True):
+            if not incremental and n > 10_000:
+                continue
+            tree = build_tree(n)
+            layout = TreeLayout((960, 100), 50, incremental=incremental)
+            layout.apply(tree)
+            observer = LayoutObserver(tree, layout)
+            tree.observer = observer
+
+            rng = random.Random(1)
+            start = time.perf_counter()
+            for _ in range(operations // 2):
+                tree.insert(rng.random() * n)
+                tree.delete_all(tree.find_by_rank(tree.root, rng.randint(1, len(tree))))
+            seconds = time.perf_counter() - start
+            print(f'  n={n:>7}  {"incremental" if incremental else "full":>11}  '
+                  f'{seconds / operations * 1000:8.3f} ms/op  {observer.moved / operations:8.1f} moved nodes/op')
+
+
+def bench_bulk_load(sizes=(10_000, 100_000)):
+    print('bulk load: insert_iterable vs bulk_load of shuffled keys with duplicates')
+    for n in sizes:
+        rng = random.Random(n)
+        keys = [rng.randrange(n) for _ in range(n)]
+        inserted = timed(lambda: RedBlackTree().insert_iterable(keys), repeat=1)
+        loaded = timed(lambda: RedBlackTree().bulk_load(keys))
+        print(f'  n={n:>7}  insert_iterable {inserted * 1000:9.2f} ms  bulk_load {loaded * 1000:8.2f} ms')
+
+
+def bench_memory(sizes=(10_000, 100_000, 1_000_000)):
+    print('memory: traced allocations of a bulk loaded tree, headless RbtBaseNode vs visual RbtNode')
+    for n in sizes:
+        keys = list(range(n))
+        for node_class in (RbtBaseNode, RbtNode):
+            tracemalloc.start()
+            tree = RedBlackTree.from_sorted(keys, node_class=node_class)
+            size = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            del tree
+            print(f'  n={n:>7}  {node_class.__name__:>11}  {size / 2 ** 20:8.1f} MB  {size / n:6.1f} B/node')
+
+
+def bench_queries(n=100_000, queries=20_000):
+    print(f'queries: {queries} lookups on a tree of {n} keys, default comparator vs a custom one')
+    rng = random.Random(2)
+    values = [rng.random() * n for _ in range(queries)]
+    keys = [int(value) for value in values]
+    indices = [rng.randint(1, n) for _ in range(queries)]
+    for name, comparator_func in (('default', None), ('custom', lambda x, y: x > y)):
+        tree = RedBlackTree.from_sorted(range(n), *(() if comparator_func is None else (comparator_func,)))
+        cases = {
+            'search': lambda: [tree.search(key) for key in keys],
+            'lower_bound': lambda: [tree.lower_bound(value) for value in values],
+            'upper_bound': lambda: [tree.upper_bound(value) for value in values],
+            'find_by_rank': lambda: [tree.find_by_rank(tree.root, i) for i in indices],
+            'get_rank_by_value': lambda: [tree.get_rank_by_value(key) for key in keys],
+            'rank': lambda: [tree.rank(value) for value in values],
+            'ranks': lambda: tree.ranks(values),
+            'select_many': lambda: tree.select_many(indices),
+        }
+        for case, func in cases.items():
+            seconds = timed(func)
+            print(f'  {name:>7}  {case:>17}  {seconds / queries * 1e6:7.3f} us/query')
+
+
+def bench_animation(sizes=(100, 1_000, 10_000), frames=50):
+    print(f'animation: move n nodes at once and play the {frames} frame movement to the end')
+    for n in sizes:
+        visualizer = SimpleNamespace(node_moved=lambda node: None)
+        nodes = [RbtNode(i, None, position=(0, 0), visualizer=visualizer) for i in range(n)]
+
+        def play():
+            controller = NodePositionUpdateController()
+            for i, node in enumerate(nodes):
+                node.position = (0, 0)
+                controller.move_node(node, (i, 100), frames)
+            for _ in range(frames):
+                controller.update()
+
+        seconds = timed(play)
+        print(f'  n={n:>7}  {seconds * 1000:9.2f} ms  {seconds / n / frames * 1e6:6.3f} us/node/frame')
+
+
+def bench_controller(sizes=(1_000, 10_000, 50_000), frames=50):
+    print(f'controller: AnimationController playing a bundle of n moves and n/10 highlights for {frames} frames')
+    for n in sizes:
+        visualizer = SimpleNamespace(node_moved=lambda node: None, node_changed=lambda node: None)
+        visualizer.node_position_update_controller = NodePositionUpdateController()
+        controller = AnimationController(visualizer)
+        nodes = [RbtNode(i, None, position=(0, 0), visualizer=visualizer) for i in range(n)]
+        bundle = [(Operation.MOVE, (node, (i, 100)), frames) for i, node in enumerate(nodes)]
+        bundle += [(Operation.HIGHLIGHT, node, frames // 2 + i % (frames // 2)) for i, node in enumerate(nodes[::10])]
+        controller.add_animated_element((Operation.BUNDLE, bundle))
+
+        start = time.perf_counter()
+        while not controller.idle():
+            controller.update()
+        seconds = time.perf_counter() - start
+        print(f'  n={n:>7}  {seconds * 1000:9.2f} ms  {seconds / frames * 1000:7.3f} ms/frame')
+
+
+def bench_paths(sizes=(100, 1_000, 10_000), point_number=100):
+    print(f'paths: n bezier paths of {point_number} points, one list per path vs one batched array')
+    for n in sizes:
+        start_points = [(0, i) for i in range(n)]
+        end_points = [(i, 100) for i in range(n)]
+        listed = timed(lambda: [
+            PathGenerator.bezier_interp_position_list(start, end, point_number)
+            for start, end in zip(start_points, end_points)
+        ], repeat=1)
+        batched = timed(lambda: PathGenerator.bezier_paths(start_points, end_points, point_number))
+        print(f'  n={n:>7}  list {listed * 1000:9.2f} ms  batched {batched * 1000:8.2f} ms')
+
+
+def bench_labels(sizes=(200, 1_000, 4_000), frames=5):
+    print(f'labels: n outlined node labels drawn per frame, first frame vs the next {frames - 1}')
+    pygame.init()
+    visualizer = SimpleNamespace(screen=pygame.display.set_mode((1920, 1080)))
+    for n in sizes:
+        gui.text_cache.clear()
+        times = []
+        for _ in range(frames):
+            start = time.perf_counter()
+            for i in range(n):
+                gui.drawTextWithOutline(visualizer, str(i), 'Helvetica', 75, Color.WHITE.value,
+                                        i * 37 % 1920, i * 53 % 1080, 90)
+            times.append(time.perf_counter() - start)
+        print(f'  n={n:>7}  first {times[0] * 1000:8.2f} ms  steady {sum(times[1:]) / (frames - 1) * 1000:8.2f} ms'
+              f'  cache hits {gui.text_cache.hits} misses {gui.text_cache.misses}')
+
+
+def settle(visualizer, n):  # tree of n nodes already in place, without playing its animations
+    visualizer.restart()
+    visualizer.tree.bulk_load(range(n))
+    for node in visualizer.tree:
+        node.update_position(node.dest_position)
+    for edge in visualizer.edge_manager.edges.values():
+        edge.update_length_multiplier(1.0)
+
+
+def bench_fps(sizes=(1_000, 10_000, 50_000), frames=5):
+    print('fps: Visualizer.draw of a settled tree with n nodes, from the default zoom to every level of detail')
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))  # Visualizer loads its icon by a relative path
+    from Visualizer import Visualizer
+
+    visualizer = Visualizer()
+    for n in sizes:
+        settle(visualizer, n)
+        for zoom in (1.0, 0.1, 0.03, 0.01, 0.001):
+            visualizer.zoom = zoom
+            visualizer.draw()
+            seconds = timed(visualizer.draw, repeat=frames)
+            print(f'  n={n:>7}  zoom {zoom:5.3f}  {visualizer.get_detail().name:>8}  '
+                  f'{seconds * 1000:9.2f} ms/frame  {1 / seconds:8.1f} fps')
+
+
+def bench_edges(n=50_000, frames=20):
+    print(f'edges: visible edges of a settled tree with {n} nodes, one RbtEdge.draw per edge vs batched')
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    from Visualizer import Visualizer
+
+    visualizer = Visualizer()
+    settle(visualizer, n)
+    for zoom, detail in ((1.0, Detail.FULL), (0.3, Detail.FULL), (0.1, Detail.SHAPES), (0.03, Detail.POINTS)):
+        visualizer.zoom = zoom
+        view_box = visualizer.get_view_box()
+        edges = visualizer.edge_index.query(view_box)
+        antialiased = detail is not Detail.POINTS
+        single = timed(lambda: [edge.draw(antialiased=antialiased) for edge in edges], repeat=frames)
+        if antialiased:
+            batched = timed(lambda: gui.drawAALines(visualizer, EdgeManager.segments(edges), 3.0), repeat=frames)
+        else:
+            batched = timed(lambda: gui.drawLines(visualizer, EdgeManager.segments(edges)), repeat=frames)
+        print(f'  zoom {zoom:4.2f}  edges {len(edges):>5}  per edge {single * 1000:7.2f} ms'
+              f'  batched {batched * 1000:7.2f} ms')
+
+
+def bench_render(sizes=(100, 1_000, 10_000), inserts=5):
+    print(f'render: frames of {inserts} insert animations into a settled tree, full redraws vs RenderScheduler')
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    from Visualizer import Visualizer
+
+    visualizer = Visualizer()
+
+    def full_frame():
+        visualizer.screen.fill(Color.LIGHT_BLUE.value)
+        visualizer.draw()
+        pygame.display.update()
+
+    def scheduled_frame():
+        rects = visualizer.render_scheduler.plan()
+        if rects:
+            visualizer.render(rects)
+            pygame.display.update(rects)
+        return rects
+
+    for n in sizes:
+        results = []
+        for frame in (full_frame, scheduled_frame):
+            visualizer.restart()
+            visualizer.tree.bulk_load(range(0, 4 * n, 4))
+            while not visualizer.animation_controller.idle():
+                visualizer.tick()
+            scheduled_frame()
+
+            frames = 0
+            start = time.perf_counter()
+            for i in range(inserts):
+                visualizer.tree.insert(4 * n * i // inserts + 1)
+                while not visualizer.animation_controller.idle():
+                    visualizer.tick()
+                    frame()
+                    frames += 1
+            results.append((time.perf_counter() - start) / frames)
+
+        idle = timed(scheduled_frame, repeat=100)
+        print(f'  n={n:>7}  full {results[0] * 1000:8.2f} ms/frame  scheduled {results[1] * 1000:8.2f} ms/frame'
+              f'  idle {idle * 1000:8.3f} ms/frame')
+
+
+def bench_fast_forward(sizes=(30, 100, 300)):
+    print('fast_forward: end state of n queued inserts, ticked until idle vs AnimationController.fast_forward')
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    from Visualizer import Visualizer
+
+    visualizer = Visualizer()
+    keys = random.Random(0).sample(range(100 * max(sizes)), max(sizes))
+    for n in sizes:
+        results = []
+        for finish in ('ticks', 'fast_forward'):
+            visualizer.restart()
+            visualizer.tree.insert_iterable(keys[:n])
+            queued = len(visualizer.animation_controller.anim_queue)
+            start = time.perf_counter()
+            if finish == 'ticks':
+                while not visualizer.animation_controller.idle():
+                    visualizer.tick()
+            else:
+                visualizer.animation_controller.fast_forward()
+            results.append(time.perf_counter() - start)
+        print(f'  n={n:>7}  queued ops {queued:>6}  ticks {results[0] * 1000:9.2f} ms'
+              f'  fast_forward {results[1] * 1000:8.2f} ms')
+
+
+def bench_pipeline(sizes=(10, 30, 100)):
+    print('pipeline: ticks until n random inserts and n/4 deletes have played out, at 60 ticks per second')
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    from Visualizer import Visualizer
+
+    visualizer = Visualizer()
+    for n in sizes:
+        visualizer.restart()
+        keys = random.Random(0).sample(range(100 * n), n)
+        visualizer.tree.insert_iterable(keys)
+        for key in keys[:n // 4]:
+            visualizer.tree.delete_by_value(key)
+        queued = len(visualizer.animation_controller.anim_queue)
+        ticks = 0
+        while not visualizer.animation_controller.idle():
+            visualizer.tick()
+            ticks += 1
+        print(f'  n={n:>7}  queued entries {queued:>6}  ticks {ticks:>7}  animation time {ticks / 60:7.1f} s')
+
+
+def bench_loop(n=1_000, seconds=2.0):
+    print(f'loop: Visualizer.run for {seconds:.0f} s while {n} values are inserted, cpu time and frame times')
+    import asyncio
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    from Visualizer import Visualizer
+
+    visualizer = Visualizer()
+    for fps_max in (30.0, 60.0, 240.0):
+        visualizer.restart()
+        visualizer.fps_max = fps_max
+        visualizer.tree.insert_iterable(random.Random(0).sample(range(10 * n), n))
+        visualizer.frame_scheduler.reset_stats()
+        start = time.process_time()
+        try:
+            asyncio.run(asyncio.wait_for(visualizer.run(), seconds))
+        except asyncio.TimeoutError:
+            pass
+        frame_scheduler = visualizer.frame_scheduler
+        print(f'  fps_max {fps_max:5.0f}  cpu {(time.process_time() - start) / seconds * 100:5.1f} %'
+              f'  frames {sum(frame_scheduler.histogram):>5}  median {frame_scheduler.percentile(0.5):>3} ms'
+              f'  p99 {frame_scheduler.percentile(0.99):>3} ms  skipped ticks {frame_scheduler.skipped_ticks}')
+
+
+def random_operations(tree, n, seed=0):  # n inserts, deletes of present values and duplicate inserts
+    rng = random.Random(seed)
+    values = []
+    for _ in range(n):
+        if values and rng.random() < 0.3:
+            tree.delete_by_value(values.pop(rng.randrange(len(values))))
+        else:
+            values.append(rng.randrange(10 * n))
+            tree.insert(values[-1])
+
+
+def bench_trace(sizes=(10_000, 100_000), seeks=20):
+    print(f'trace: n random operations run plainly, recorded, replayed onto an empty tree and {seeks} random seeks')
+    for n in sizes:
+        plain = timed(lambda: random_operations(RedBlackTree(node_class=RbtBaseNode), n), repeat=1)
+        recorder = TraceRecorder()
+        record = timed(lambda: random_operations(RedBlackTree(node_class=RbtBaseNode, observer=recorder), n), repeat=1)
+        data = recorder.getvalue()
+        player = TracePlayer(data, RedBlackTree(node_class=RbtBaseNode))
+        replay = timed(player.play, repeat=1)
+        rng = random.Random(1)
+        seek = timed(lambda: [player.seek(rng.randrange(n)) for _ in range(seeks)], repeat=1) / seeks
+        print(f'  n={n:>7}  plain {plain * 1000:8.1f} ms  recorded {record * 1000:8.1f} ms'
+              f'  trace {len(data) / n:6.1f} bytes/op  replay {replay * 1000:8.1f} ms  seek {seek * 1000:7.2f} ms')
+
+
+def bench_timeline(n=100_000, operations=2_000, jumps=(1, 10, 100, 1_000)):
+    print(f'timeline: {operations} random operations on a tree of {n} nodes, then jumps back by a number of them')
+    tree = RedBlackTree(node_class=RbtBaseNode)
+    tree.bulk_load(range(0, 10 * n, 10))
+    plain = timed(lambda: random_operations(tree, operations), repeat=1)
+    tree = RedBlackTree(node_class=RbtBaseNode)
+    tree.bulk_load(range(0, 10 * n, 10))
+    timeline = Timeline(tree)
+    recorded = timed(lambda: random_operations(tree, operations), repeat=1)
+    print(f'  operations plain {plain * 1000:8.1f} ms  recorded {recorded * 1000:8.1f} ms')
+    for jump in jumps:
+        undo = timed(lambda: (timeline.seek(len(timeline)), timeline.undo(jump)), repeat=3)
+        values = tree.get_values()
+        rebuild = timed(lambda: RedBlackTree(node_class=RbtBaseNode).insert_iterable(values), repeat=1)
+        print(f'  back {jump:>5}  redo all + undo {undo * 1000:8.2f} ms'
+              f'  rebuild through insert_iterable {rebuild * 1000:8.1f} ms')
+
+
+def bench_persistent(sizes=(10_000, 100_000, 1_000_000), operations=2_000):
+    print(f'persistent: {operations} inserts and deletes on a tree of n nodes, in place vs one kept version each')
+    for n in sizes:
+        rng = random.Random(n)
+        keys = rng.sample(range(2 * n), operations)
+        tree = RedBlackTree.from_sorted(range(0, 2 * n, 2), node_class=RbtBaseNode)
+        in_place = timed(lambda: [
+            tree.insert(key) if key % 2 else tree.delete_all_by_value(key) for key in keys
+        ], repeat=1)
+
+        def keep_versions(base):
+            versions = [base]
+            for key in keys:
+                versions.append(versions[-1].insert(key) if key % 2 else versions[-1].delete_all_by_value(key))
+            return versions
+
+        base = PersistentRedBlackTree.from_sorted(range(0, 2 * n, 2))
+        persistent = timed(lambda: keep_versions(base), repeat=1)
+        tracemalloc.start()
+        versions = keep_versions(base)
+        memory = tracemalloc.get_traced_memory()[0] / operations
+        tracemalloc.stop()
+
+        oldest, newest = versions[0], versions[-1]
+        queries = rng.sample(range(2 * n), 1_000)
+        lookups = [timed(lambda: [version.lower_bound(key) for key in queries]) for version in (oldest, newest)]
+        print(f'  n={n:>8}  in place {in_place / operations * 1e6:6.1f} us/op'
+              f'  persistent {persistent / operations * 1e6:6.1f} us/op  {memory:7.0f} bytes/version'
+              f'  lower_bound oldest {lookups[0] * 1e3:5.2f} ms  newest {lookups[1] * 1e3:5.2f} ms')
+
+
+BENCHMARKS = {
+    'layout': bench_layout,
+    'incremental_layout': bench_incremental_layout,
+    'bulk_load': bench_bulk_load,
+    'memory': bench_memory,
+    'queries': bench_queries,
+    'animation': bench_animation,
+    'controller': bench_controller,
+    'paths': bench_paths,
+    'labels': bench_labels,
+    'fps': bench_fps,
+    'edges': bench_edges,
+    'render': bench_render,
+    'loop': bench_loop,
+    'fast_forward': bench_fast_forward,
+    'pipeline': bench_pipeline,
+    'trace': bench_trace,
+    'timeline': bench_timeline,
+    'persistent': bench_persistent,
+}
+
+if __name__ == '__main__':
+    for name in sys.argv[1:] or BENCHMARKS:
+        BENCHMARKS[name]()
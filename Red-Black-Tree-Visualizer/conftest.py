@@ -0,0 +1,13 @@
+import os
+
+import pytest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')  # tests that need a Visualizer run without a window
+
+
+@pytest.fixture(scope='module')
+def visualizer():
+    # Visualizer loads its icon by a relative path
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    from Visualizer import Visualizer
+    return Visualizer()
@@ -1,79 +1,235 @@
-from queue import Queue
+import heapq
+from collections import deque
 
-from controllers.PathGenerator import PathGenerator
 from utility.enums import Operation, Color
 
 
+class AnimatedOperation:
+    # One playing op, started on frame start of the controller clock and over after length frames
+    __slots__ = ('operation', 'payload', 'length', 'start', 'end', 'resources')
+
+    def __init__(self, operation, payload, length, start, resources):
+        self.operation = operation
+        self.payload = payload
+        self.length = length
+        self.start = start
+        self.end = start + length
+        self.resources = resources
+
+    def __repr__(self):
+        return f'({self.operation}, {self.payload}, {self.length}, {self.start})'
+
+
 class AnimationController:
-    def __init__(self, visualizer):
+    # Plays every queue entry, all ops of a bundle at once, as soon as none of the nodes and edges it touches are
+    # still animated by a playing op or waiting for an earlier entry, so entries on different parts of the tree
+    # overlap while every node and edge still goes through its ops in the order they were queued.
+    # Every op kind has a table entry for what it does when it starts, on every frame while it plays and when it is
+    # over, only ops with a per frame handler are visited on each update and the rest wait in a heap ordered by
+    # the frame they end on.
+    def __init__(self, visualizer, lookahead=256):
         self.visualizer = visualizer
-        self.curr_animated_elements = []
-        self.anim_queue = Queue()
-        self.node_update_set = set()
-        self.curr_animated_color_nodes = []
+        self.lookahead = lookahead  # queue entries looked at for one that can start, per update
+        self.frame = 0.0
+        self.anim_queue = deque()  # (entry, nodes and edges it touches)
+        self.playing = []  # heap of (end frame, start order, AnimatedOperation)
+        self.stepping = dict()  # playing ops with a per frame handler, in the order they started
+        self.busy = dict()  # node or edge -> number of playing ops touching it
+        self.schedule = False  # whether an entry may be able to start
+        self.sequence = 0
+        self.node_update_set = set()  # recolored nodes for the next CHANGE_COLOR op
 
+        self.start_handlers = {
+            Operation.INSERT: self._start_move,
+            Operation.MOVE: self._start_move,
+            Operation.HIGHLIGHT: self._start_highlight,
+            Operation.CHANGE_LEN: self._start_len,
+        }
+        self.step_handlers = {
+            Operation.HIGHLIGHT: self._step_highlight,
+            Operation.CHANGE_COLOR: self._step_color,
+        }
+        self.end_handlers = {
+            Operation.HIGHLIGHT: self._end_highlight,
+        }
 
     def add_animated_element(self, animated_element):
-        self.anim_queue.put(animated_element)
+        if animated_element[0] == Operation.BUNDLE:
+            bundle = [self._claim_color_nodes(operation) for operation in animated_element[1]]
+            animated_element = (Operation.BUNDLE, bundle)
+            resources = set()
+            for operation in bundle:
+                resources.update(self._resources(operation))
+        else:
+            animated_element = self._claim_color_nodes(animated_element)
+            resources = self._resources(animated_element)
+        self.anim_queue.append((animated_element, resources))
+        self.schedule = True
+
+    def _claim_color_nodes(self, operation):
+        # A color change animates the nodes recolored before it was queued, which also makes them known up front
+        if operation[0] == Operation.CHANGE_COLOR and operation[1] is None:
+            operation = (Operation.CHANGE_COLOR, tuple(self.node_update_set), operation[2])
+            self.node_update_set.clear()
+        return operation
+
+    @staticmethod
+    def _resources(operation):  # nodes and edges an op touches
+        kind, payload = operation[0], operation[1]
+        if kind == Operation.HIGHLIGHT:
+            return (payload,)
+        elif kind == Operation.CHANGE_COLOR:
+            return payload
+        return (payload[0],)  # node or edge of INSERT, MOVE and CHANGE_LEN
 
     def idle(self):
-        return self.anim_queue.empty() and len(self.curr_animated_elements) == 0
+        return not self.anim_queue and not self.playing
+
+    def update(self, steps=1.0):  # steps are frames of the op lengths, fractions of them with a time scale
+        if self.schedule:
+            self._start_ready()
 
-    def update(self):
-        if len(self.curr_animated_elements) == 0 and not self.anim_queue.empty():
-            queue_front = self.anim_queue.get()
+        frame = self.frame
+        step_handlers = self.step_handlers
+        for animated in self.stepping:
+            step_handlers[animated.operation](animated, (frame - animated.start) / animated.length)
+
+        self.frame = frame = frame + steps
+        playing, end_handlers = self.playing, self.end_handlers
+        while playing and playing[0][0] <= frame:
+            animated = heapq.heappop(playing)[2]
+            self.stepping.pop(animated, None)
+            handler = end_handlers.get(animated.operation)
+            if handler is not None:
+                handler(animated)
+            self._release(animated.resources)
+
+    def _start_ready(self):
+        # Starts the entries whose nodes and edges are not busy and not touched by an earlier entry still waiting
+        self.schedule = False
+        busy = self.busy
+        blocked = set()
+        waiting = deque()
+        queue = self.anim_queue
+        looked_at = 0
+        while queue and looked_at < self.lookahead:
+            looked_at += 1
+            entry, resources = queue.popleft()
+            if any(resource in busy or resource in blocked for resource in resources):
+                waiting.append((entry, resources))
+                blocked.update(resources)
+                continue
+            if entry[0] == Operation.BUNDLE:
+                for operation in entry[1]:
+                    self._start(*operation)
+            else:
+                self._start(*entry)
+        if queue and not waiting:
+            self.schedule = True  # the lookahead ran out with nothing waiting, the rest is looked at next update
+        waiting.extend(queue)
+        self.anim_queue = waiting
+
+    def _start(self, operation, payload, length):
+        resources = self._resources((operation, payload))
+        animated = AnimatedOperation(operation, payload, length, self.frame, resources)
+        busy = self.busy
+        for resource in resources:
+            busy[resource] = busy.get(resource, 0) + 1
+        handler = self.start_handlers.get(operation)
+        if handler is not None:
+            handler(animated)
+        if operation in self.step_handlers:
+            self.stepping[animated] = None
+        heapq.heappush(self.playing, (animated.end, self.sequence, animated))
+        self.sequence += 1
+
+    def _release(self, resources):
+        busy = self.busy
+        for resource in resources:
+            count = busy[resource] - 1
+            if count:
+                busy[resource] = count
+            else:
+                del busy[resource]
+                self.schedule = True
+
+    # Handlers, by op kind
+
+    def _start_move(self, animated):
+        node, node_pos = animated.payload
+        self.visualizer.node_position_update_controller.move_node(node, node_pos, animated.length)
+
+    def _start_highlight(self, animated):
+        animated.payload.outline_color = Color.HIGHLIGHT_YELLOW.value
+
+    def _step_highlight(self, animated, length_proportion):
+        node = animated.payload
+        if length_proportion <= 0.2:
+            node.radius_mult = (1 + 0.1 * (length_proportion / 0.2) ** 2)
+        elif length_proportion <= 0.8:
+            node.radius_mult = (1 + 0.1)
+        else:
+            node.radius_mult = (1 + 0.1 * ((1 - length_proportion) / 0.2) ** 2)
+        self.visualizer.node_changed(node)
+
+    def _end_highlight(self, animated):
+        animated.payload.radius_mult = 1.0
+        self.visualizer.node_changed(animated.payload)
+
+    def _step_color(self, animated, length_proportion):
+        for node in animated.payload:
+            node.additional_circle_radius_mult = ((2 ** ((1 - length_proportion) * 5)) - 1) / 31
+            self.visualizer.node_changed(node)
+
+    def _start_len(self, animated):
+        edge, edge_mult = animated.payload
+        self.visualizer.edge_length_update_controller.change_len(edge, edge_mult, animated.length)
+
+    def fast_forward(self):
+        # Every playing and queued op straight to its end state, in one pass over them
+        visualizer = self.visualizer
+        visualizer.node_position_update_controller.finish()
+        visualizer.edge_length_update_controller.finish()
+
+        playing = sorted(self.playing, key=lambda entry: entry[1])  # in the order they started
+        elements = [(animated.operation, animated.payload) for _, _, animated in playing]
+        for queue_front, _ in self.anim_queue:
             if queue_front[0] == Operation.BUNDLE:
-                for operation in queue_front[1]:
-                    self.curr_animated_elements.append((operation[0], operation[1], operation[2], 0))
+                elements.extend(queue_front[1])
             else:
-                self.curr_animated_elements.append((queue_front[0], queue_front[1], queue_front[2], 0))
-
-        for i in range(len(self.curr_animated_elements)):
-            length_proportion = self.curr_animated_elements[i][3] / self.curr_animated_elements[i][2]
-            if self.curr_animated_elements[i][0] == Operation.INSERT and self.curr_animated_elements[i][3] == 0:
-                node, node_pos = self.curr_animated_elements[i][1]
-                self.visualizer.node_position_update_controller.move_node(node, node_pos, self.curr_animated_elements[i][2])
-            elif self.curr_animated_elements[i][0] == Operation.HIGHLIGHT:
-                node = self.curr_animated_elements[i][1]
-                node.outline_color = Color.HIGHLIGHT_YELLOW.value
-                if length_proportion <= 0.2:
-                    node.radius_mult = (1 + 0.1 * (length_proportion / 0.2) ** 2)
-                elif length_proportion <= 0.8:
-                    node.radius_mult = (1 + 0.1)
-                else:
-                    node.radius_mult = (1 + 0.1 * ((1 - length_proportion) / 0.2) ** 2)
-            elif self.curr_animated_elements[i][0] == Operation.MOVE and self.curr_animated_elements[i][3] == 0:
-                node, node_pos = self.curr_animated_elements[i][1]
-                self.visualizer.node_position_update_controller.move_node(node, node_pos, self.curr_animated_elements[i][2])
-            elif self.curr_animated_elements[i][0] == Operation.CHANGE_COLOR:
-                if self.curr_animated_elements[i][3] == 0:
-                    self.curr_animated_color_nodes = [node for node in self.node_update_set]
-                    self.node_update_set.clear()
-                for node in self.curr_animated_color_nodes:
-                    node.additional_circle_radius_mult = ((2 ** ((1 - length_proportion) * 5)) - 1) / 31
-            elif self.curr_animated_elements[i][0] == Operation.CHANGE_LEN and self.curr_animated_elements[i][3] == 0:
-                edge, edge_mult = self.curr_animated_elements[i][1]
-                self.visualizer.edge_length_update_controller.change_len(edge, edge_mult, self.curr_animated_elements[i][2])
-
-
-        to_be_deleted = []
-        if len(self.curr_animated_elements) != 0:
-            for i in range(len(self.curr_animated_elements)):
-                self.curr_animated_elements[i] = (
-                    self.curr_animated_elements[i][0],
-                    self.curr_animated_elements[i][1],
-                    self.curr_animated_elements[i][2],
-                    self.curr_animated_elements[i][3] + 1
-                )
-                if self.curr_animated_elements[i][2] == self.curr_animated_elements[i][3]:
-                    to_be_deleted.append(i)
-
-                    if self.curr_animated_elements[i][0] == Operation.HIGHLIGHT:
-                        self.curr_animated_elements[i][1].radius_mult = 1.0
-                    elif self.curr_animated_elements[i][0] == Operation.CHANGE_COLOR:
-                        self.curr_animated_color_nodes = []
-
-
-        self.curr_animated_elements = [
-            elem for i, elem in enumerate(self.curr_animated_elements) if i not in to_be_deleted
-            ]
+                elements.append(queue_front)
+        self.anim_queue.clear()
+        self.playing = []
+        self.stepping = dict()
+        self.busy = dict()
+        self.schedule = False
+
+        # Later ops on the same node or edge override earlier ones, so each target is only applied once
+        positions, lengths, highlighted, recolored = dict(), dict(), set(), set(self.node_update_set)
+        for element in elements:
+            operation = element[0]
+            if operation == Operation.INSERT or operation == Operation.MOVE:
+                node, node_pos = element[1]
+                positions[node] = node_pos
+            elif operation == Operation.HIGHLIGHT:
+                highlighted.add(element[1])
+            elif operation == Operation.CHANGE_LEN:
+                edge, edge_mult = element[1]
+                lengths[edge] = edge_mult
+            elif operation == Operation.CHANGE_COLOR:
+                recolored.update(element[1])
+
+        for node, node_pos in positions.items():
+            node.update_position(node_pos)
+        for edge, edge_mult in lengths.items():
+            edge.update_length_multiplier(edge_mult)
+        for node in highlighted:
+            node.radius_mult = 1.0
+            visualizer.node_changed(node)
+        for node in recolored:
+            node.clear_additional_circle()
+            visualizer.node_changed(node)
+        self.node_update_set.clear()
+
+        visualizer.tree.update()
+        visualizer.edge_manager.update()
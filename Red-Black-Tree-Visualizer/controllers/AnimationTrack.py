@@ -0,0 +1,26 @@
+from controllers.PathGenerator import PathGenerator
+
+
+class AnimationTrack:
+    # Transition from start to end during [t0, t0 + duration], sampled at any time instead of precomputed per frame
+    __slots__ = ('start', 'end', 't0', 'duration', 'easing')
+
+    def __init__(self, start, end, t0, duration, easing=PathGenerator.bezier_ease):
+        self.start = start
+        self.end = end
+        self.t0 = t0
+        self.duration = duration
+        self.easing = easing
+
+    def __repr__(self):
+        return f'({self.start}, {self.end}, {self.t0}, {self.duration})'
+
+    def end_time(self):
+        return self.t0 + self.duration
+
+    def progress(self, time):
+        if time >= self.t0 + self.duration:
+            return 1.0
+        if time <= self.t0:
+            return 0.0
+        return self.easing((time - self.t0) / self.duration)
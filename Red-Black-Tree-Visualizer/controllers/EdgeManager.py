@@ -1,21 +1,88 @@
 from rbt.RbtEdge import RbtEdge
-from utility.enums import Operation
+from utility.enums import Detail, Operation
+from utility.gui import drawAALines, drawLines
+
+try:
+    import numpy as np
+except ImportError:  # every edge draws itself instead
+    np = None
 
 
 class EdgeManager:
-    def __init__(self, visualizer):
+    def __init__(self, visualizer, debug=False):
         self.edges = dict()
         self.edges_set = set()
+        self.node_edges = dict()  # node -> RbtEdge objects touching it, to keep them in the visualizer edge_index
         self.edges_being_removed_set = set()
         self.visualizer = visualizer
-
-    def draw(self):
-        for edge in self.edges.values():
-            edge.draw()
+        self.debug = debug  # compare every delta against a full diff of the tree edges
+
+        # Changes applied since the last animation bundle, value tells whether the RbtEdge was newly created
+        self.added_edges = dict()
+        self.removed_edges = dict()
+
+    def draw(self, view_box=None, detail=Detail.FULL, thickness=3.0):
+        if view_box is None:
+            view_box = self.visualizer.get_view_box()
+        antialiased = detail is not Detail.POINTS
+        edges = self.visualizer.edge_index.query(view_box)
+        if np is None:
+            for edge in edges:
+                edge.draw(thickness, antialiased)
+            return
+
+        segments = self.segments(edges)
+        if antialiased:
+            drawAALines(self.visualizer, segments, thickness)
+        else:
+            drawLines(self.visualizer, segments)
+
+    @staticmethod
+    def segments(edges):
+        # World endpoints of the drawn part of every edge as one (n, 4) array, shortened around the middle by
+        # their length multipliers the same way RbtEdge.draw does it, hidden edges left out
+        if not edges:
+            return np.zeros((0, 4))
+        rows = np.array([(*edge.node1.position, *edge.node2.position, edge.length_multiplier) for edge in edges])
+        rows = rows[rows[:, 4] >= 0.001]
+        segments, multiplier = rows[:, :4], rows[:, 4]
+
+        shortened = multiplier < 1.0
+        if shortened.any():
+            short = segments[shortened]
+            direction = short[:, 2:] - short[:, :2]
+            length = np.hypot(*direction.T)
+            shift = np.floor(length * (1.0 - multiplier[shortened]) / 2)
+            step = direction * (shift / np.where(length > 0, length, 1))[:, None]
+            short[:, :2] += step
+            short[:, 2:] -= step
+            segments[shortened] = short
+        return segments
+
+    def _create_edge(self, edge):
+        edge_obj = self.edges[edge] = RbtEdge(*edge, visualizer=self.visualizer)
+        for node in edge:
+            self.node_edges.setdefault(node, set()).add(edge_obj)
+        self.visualizer.edge_index.update(edge_obj, edge_obj.get_box())
+        self.visualizer.edge_changed(edge_obj)
+
+    def _delete_edge(self, edge):
+        edge_obj = self.edges.pop(edge)
+        for node in edge:
+            node_edges = self.node_edges[node]
+            node_edges.discard(edge_obj)
+            if not node_edges:
+                del self.node_edges[node]
+        self.visualizer.edge_changed(edge_obj)
+        self.visualizer.edge_index.remove(edge_obj)
+
+    @staticmethod
+    def normalize(edge):
+        node, node2 = edge
+        return (node, node2) if node.value < node2.value else (node2, node)
 
     def add_edge(self, edge):
-        node, node2 = edge
-        edge = (node, node2) if node.value < node2.value else (node2, node)
+        edge = self.normalize(edge)
         if edge in self.edges_set:
             return False
 
@@ -24,19 +91,19 @@ class EdgeManager:
         if edge in self.edges_being_removed_set:
             self.edges_being_removed_set.remove(edge)
         else:
-            edge_obj = RbtEdge(*edge, visualizer=self.visualizer)
-            self.edges[edge] = edge_obj
+            self._create_edge(edge)
         return True
 
     def remove_edge(self, edge):
+        edge = self.normalize(edge)
         if edge not in self.edges_set:
             return False
         self.edges_set.remove(edge)
         self.edges_being_removed_set.add(edge)
+        return True
 
     def get_edge(self, edge):
-        node, node2 = edge
-        edge = (node, node2) if node.value < node2.value else (node2, node)
+        edge = self.normalize(edge)
         if edge in self.edges_set or edge in self.edges_being_removed_set:
             return self.edges[edge]
 
@@ -47,10 +114,53 @@ class EdgeManager:
         to_be_removed = set()
         for edge in self.edges_being_removed_set:
             if self.edges[edge].length_multiplier <= 0.0:
-                del self.edges[edge]
+                self._delete_edge(edge)
                 to_be_removed.add(edge)
         self.edges_being_removed_set.difference_update(to_be_removed)
 
+    def apply_delta(self, edges_to_add, edges_to_remove):
+        for edge in edges_to_remove:
+            edge = self.normalize(edge)
+            if edge in self.added_edges:
+                # added and removed before being animated, it was never visible
+                created = self.added_edges.pop(edge)
+                self.edges_set.remove(edge)
+                if created:
+                    self._delete_edge(edge)
+                else:
+                    self.edges_being_removed_set.add(edge)
+            elif self.remove_edge(edge):
+                self.removed_edges[edge] = False
+
+        for edge in edges_to_add:
+            edge = self.normalize(edge)
+            if edge in self.removed_edges:
+                del self.removed_edges[edge]
+                self.add_edge(edge)
+            else:
+                created = edge not in self.edges_being_removed_set
+                if self.add_edge(edge):
+                    self.added_edges[edge] = created
+
+    def sync(self, edges_set):
+        self.apply_delta(edges_set - self.edges_set, self.edges_set - edges_set)
+
+    def delta_with_animations(self, add_frames=0, remove_frames=50):
+        edges_to_add, edges_to_remove = list(self.added_edges), list(self.removed_edges)
+        revived = [edge for edge, created in self.added_edges.items() if not created]
+        self.added_edges.clear()
+        self.removed_edges.clear()
+        bundle = self._animations(edges_to_add, edges_to_remove, add_frames, remove_frames)
+        if add_frames <= 0:
+            # an edge added back while it was shrinking away would stay at the length it shrinks to
+            bundle.extend((Operation.CHANGE_LEN, (self.edges[edge], 1.0), 50) for edge in revived)
+        return bundle
+
+    def check_consistency(self, edges_set):
+        missing, extra = edges_set - self.edges_set, self.edges_set - edges_set
+        if missing or extra:
+            raise RuntimeError(f'Edge manager out of sync, missing: {missing}, extra: {extra}')
+
     def edge_diffs(self, new_edges_set):
         edges_to_add = new_edges_set - self.edges_set
         edges_to_remove = self.edges_set - new_edges_set
@@ -65,6 +175,9 @@ class EdgeManager:
 
     def edge_diffs_with_animations(self, new_edges_set, add_frames=0, remove_frames=50):
         edges_to_add, edges_to_remove = self.edge_diffs(new_edges_set)
+        return self._animations(edges_to_add, edges_to_remove, add_frames, remove_frames)
+
+    def _animations(self, edges_to_add, edges_to_remove, add_frames, remove_frames):
         bundle = []
 
         if add_frames > 0:
@@ -77,23 +190,3 @@ class EdgeManager:
                 bundle.append((Operation.CHANGE_LEN, (self.edges[edge], 0.0), remove_frames))
 
         return bundle
-
-
-        #
-        # self.edges_set.update(edges_to_add)
-        #
-        # for edge in edges_to_add:
-        #     self.edges[edge] = RbtEdge(*edge, self.visualizer, 1.0)
-        #     # self.visualizer.animation_controller.add_animated_element((Operation.CHANGE_LEN, (self.edges[edge], 1.0), 50))
-        #
-        # anims = []
-        # for edge in edges_to_remove:
-        #     print('prrrt', edge)
-        #     anims.append((Operation.CHANGE_LEN, (self.edges[edge], 0.0), 50))
-        #     # del self.edges[edge]
-        # if anims:
-        #     self.visualizer.animation_controller.add_animated_element((Operation.BUNDLE, anims))
-        #
-        # self.edges_being_removed_set.update(edges_to_remove)
-        # self.edges_set.difference_update(edges_to_remove)
-
@@ -0,0 +1,76 @@
+import time
+
+
+class FrameScheduler:
+    # Fixed timestep loop: the world ticks visualizer.tps_max times per second whatever the frame rate, frames are
+    # drawn at most visualizer.fps_max times per second, with the animations sampled between the last tick and the
+    # next one, and when ticking falls more than max_ticks behind the rest of the backlog is skipped instead of
+    # making every following frame slower. The time between frames goes to a histogram in whole milliseconds.
+    def __init__(self, visualizer, max_ticks=5, histogram_size=100, clock=time.perf_counter):
+        self.visualizer = visualizer
+        self.max_ticks = max_ticks
+        self.clock = clock
+
+        now = clock()
+        self.last_time = now
+        self.tick_delta = 0.0  # time not ticked yet, below one tick unless ticks are running
+        self.next_frame = now
+        self.last_frame = None
+        self.skipped_ticks = 0
+        self.histogram = [0] * (histogram_size + 1)  # frames per millisecond of frame time, the last one for longer
+
+    def tick_duration(self):
+        return 1 / self.visualizer.tps_max
+
+    def ticks(self):  # how many ticks to run now
+        now = self.clock()
+        self.tick_delta += now - self.last_time
+        self.last_time = now
+
+        tick_duration = self.tick_duration()
+        ticks = int(self.tick_delta / tick_duration)
+        if ticks > self.max_ticks:
+            self.skipped_ticks += ticks - self.max_ticks
+            ticks = self.max_ticks
+            self.tick_delta = ticks * tick_duration
+        self.tick_delta -= ticks * tick_duration
+        return ticks
+
+    def alpha(self):  # how far the frame is between the last tick and the next one
+        return min(self.tick_delta / self.tick_duration(), 1.0)
+
+    def frame_due(self):
+        now = self.clock()
+        if now < self.next_frame:
+            return False
+
+        frame_duration = 1 / self.visualizer.fps_max
+        # Keep to the frame rate on average, but a late frame starts the count again instead of being caught up on
+        self.next_frame += frame_duration
+        if self.next_frame <= now:
+            self.next_frame = now + frame_duration
+        if self.last_frame is not None:
+            self.histogram[min(int((now - self.last_frame) * 1000), len(self.histogram) - 1)] += 1
+        self.last_frame = now
+        return True
+
+    def wait(self):  # seconds the loop can sleep before there is a tick or a frame to do
+        now = self.clock()
+        next_tick = now + self.tick_duration() - self.tick_delta - (now - self.last_time)
+        return max(0.0, min(next_tick, self.next_frame) - now)
+
+    def percentile(self, fraction):  # frame time in milliseconds that this fraction of frames did not go over
+        total = sum(self.histogram)
+        if not total:
+            return None
+        count = 0
+        for ms, frames in enumerate(self.histogram):
+            count += frames
+            if count >= fraction * total:
+                return ms + 1
+        return len(self.histogram)
+
+    def reset_stats(self):
+        self.histogram = [0] * len(self.histogram)
+        self.last_frame = None
+        self.skipped_ticks = 0
@@ -1,4 +1,20 @@
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:  # bezier_paths needs NumPy, the single path functions work without it
+    np = None
+
+
 class PathGenerator:
+    @staticmethod
+    def smoothstep(t):
+        return 3 * t ** 2 - 2 * t ** 3
+
+    @staticmethod
+    def bezier_ease(t):  # progress along bezier_interp_position_list with its default control and density
+        return PathGenerator.smoothstep(PathGenerator.smoothstep(t))
+
     @staticmethod
     def bezier_interpolation(p0, p1, p2, p3, t):
         x = (1 - t) ** 3 * p0[0] + 3 * (1 - t) ** 2 * t * p1[0] + 3 * (1 - t) * t ** 2 * p2[0] + t ** 3 * p3[0]
@@ -7,7 +23,14 @@ class PathGenerator:
 
     @staticmethod
     def bezier_interp_position_list(start_point, end_point, point_number=100, int_point1=None,
-                                    int_point2=None, density_function=lambda x: 3 * x ** 2 - 2 * x ** 3):
+                                    int_point2=None, density_function=smoothstep):
+        if np is not None:
+            paths = PathGenerator.bezier_paths(
+                (start_point,), (end_point,), point_number,
+                None if int_point1 is None else (int_point1,), None if int_point2 is None else (int_point2,),
+                density_function
+            )
+            return [tuple(position) for position in paths[0].tolist()]
 
         if int_point1 is None and int_point2 is not None:
             int_point1 = int_point2
@@ -28,3 +51,32 @@ class PathGenerator:
 
         return positions
 
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def bernstein_basis(point_number, density_function=smoothstep):
+        # (point_number, 4) weights of the control points, shared by every path with the same sampling
+        t = density_function(np.arange(point_number) / (point_number - 1))
+        s = 1 - t
+        basis = np.stack((s ** 3, 3 * s ** 2 * t, 3 * s * t ** 2, t ** 3), axis=1)
+        basis.flags.writeable = False
+        return basis
+
+    @staticmethod
+    def bezier_paths(start_points, end_points, point_number=100, int_points1=None,
+                     int_points2=None, density_function=smoothstep):
+        # All paths at once as a (len(start_points), point_number, dimension) array,
+        # density_function has to accept NumPy arrays
+        start_points = np.asarray(start_points, dtype=float)
+        end_points = np.asarray(end_points, dtype=float)
+        if int_points1 is None and int_points2 is not None:
+            int_points1 = int_points2
+        elif int_points2 is None and int_points1 is not None:
+            int_points2 = int_points1
+        elif int_points1 is None and int_points2 is None:
+            int_points1 = start_points
+            int_points2 = end_points
+
+        control_points = np.stack((
+            start_points, np.asarray(int_points1, dtype=float), np.asarray(int_points2, dtype=float), end_points
+        ), axis=1)
+        return PathGenerator.bernstein_basis(point_number, density_function) @ control_points
@@ -0,0 +1,87 @@
+import pygame
+
+from utility.enums import Detail
+
+
+class RenderScheduler:
+    # Decides what has to be drawn again before the next display update: nothing when the picture did not change,
+    # the whole screen after the camera or the animation state changed, otherwise only the screen rects of
+    # what moved or changed since the last frame, merged until they do not overlap.
+    def __init__(self, visualizer, max_rects=32, max_area=0.5, border=4):
+        self.visualizer = visualizer
+        self.max_rects = max_rects
+        self.max_area = max_area  # part of the screen above which one full redraw is cheaper
+        # Antialiased lines come out a bit different next to the clip border, so every rect is drawn with a
+        # border around it that is never shown, and rects are merged as soon as their borders touch
+        self.border = border
+
+        self.full = True
+        self.rects = []
+        self.state = None
+        self.text_state = None
+        self.text_rect = None
+
+    def invalidate(self):
+        self.full = True
+        self.rects = []
+
+    def mark_dirty(self, box):  # world space box, as kept in the spatial indexes
+        if self.full or box is None:
+            return
+        visualizer = self.visualizer
+        zoom = visualizer.zoom
+        margin = int(2 * zoom) + 2  # line thickness and rounding
+        x0 = int((box[0] + visualizer.x_offset) * zoom) - margin
+        y0 = int((box[1] + visualizer.y_offset) * zoom) - margin
+        x1 = int((box[2] + visualizer.x_offset) * zoom) + margin
+        y1 = int((box[3] + visualizer.y_offset) * zoom) + margin
+        self.add_rect(pygame.Rect(x0, y0, x1 - x0 + 1, y1 - y0 + 1))
+
+    def add_rect(self, rect):  # screen space
+        if self.full:
+            return
+        rect = rect.clip(self.visualizer.screen.get_rect())
+        if rect.width and rect.height:
+            self.rects.append(rect)
+            if len(self.rects) > 4 * self.max_rects:
+                self.invalidate()
+
+    def plan(self):
+        # Screen rects to draw again and pass to pygame.display.update, empty when the frame can be skipped
+        visualizer = self.visualizer
+        screen_rect = visualizer.screen.get_rect()
+        state = (visualizer.x_offset, visualizer.y_offset, visualizer.zoom,
+                 visualizer.animation_controller.idle(), screen_rect.size)
+        if state != self.state:
+            self.state = state
+            self.invalidate()
+
+        text_input = visualizer.text_input
+        text_rect = visualizer.get_text_input_rect()
+        text_state = (text_input.value, text_input.manager.cursor_pos, text_input.cursor_visible, text_rect.size)
+        if text_state != self.text_state:
+            self.text_state = text_state
+            self.add_rect(text_rect.union(self.text_rect) if self.text_rect else text_rect)
+            self.text_rect = text_rect
+
+        if self.rects and visualizer.get_detail() is Detail.SUBTREES:
+            self.invalidate()  # a subtree glyph changes with any node under it
+
+        if self.full:
+            self.full = False
+            return [screen_rect]
+
+        merged = []
+        reach = 4 * self.border
+        for rect in self.rects:
+            i = rect.inflate(reach, reach).collidelist(merged)
+            while i != -1:
+                rect = rect.union(merged.pop(i))
+                i = rect.inflate(reach, reach).collidelist(merged)
+            merged.append(rect)
+        self.rects = []
+
+        area = sum(rect.width * rect.height for rect in merged)
+        if len(merged) > self.max_rects or area > self.max_area * screen_rect.width * screen_rect.height:
+            return [screen_rect]
+        return merged
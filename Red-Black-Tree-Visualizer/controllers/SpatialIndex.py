@@ -0,0 +1,78 @@
+class SpatialIndex:
+    # Hierarchical uniform grid over boxes (x0, y0, x1, y1). Cells double in size from level to level and an item
+    # is kept in the one cell holding its top-left corner on the first level whose cells are not smaller than it,
+    # so a query only has to look one cell up and left of its own box on every level.
+    def __init__(self, cell_size=128):
+        self.cell_size = cell_size
+        self.levels = []  # cell -> set of items, one dict per level
+        self.items = dict()  # item -> (level, cell, box)
+
+    def __len__(self):
+        return len(self.items)
+
+    def update(self, item, box):
+        x0, y0, x1, y1 = box
+        size = max(x1 - x0, y1 - y0)
+        level = 0
+        cell_size = self.cell_size
+        while cell_size < size:
+            level += 1
+            cell_size *= 2
+        cell = (int(x0 // cell_size), int(y0 // cell_size))
+
+        entry = self.items.get(item)
+        if entry is not None:
+            if entry[0] == level and entry[1] == cell:
+                self.items[item] = (level, cell, box)
+                return
+            self._discard(item, entry)
+
+        while len(self.levels) <= level:
+            self.levels.append(dict())
+        bucket = self.levels[level].get(cell)
+        if bucket is None:
+            bucket = self.levels[level][cell] = set()
+        bucket.add(item)
+        self.items[item] = (level, cell, box)
+
+    def get(self, item):  # box the item is kept under, None when it is not in the index
+        entry = self.items.get(item)
+        return None if entry is None else entry[2]
+
+    def remove(self, item):
+        entry = self.items.pop(item, None)
+        if entry is not None:
+            self._discard(item, entry)
+
+    def _discard(self, item, entry):
+        level, cell, _ = entry
+        bucket = self.levels[level][cell]
+        bucket.discard(item)
+        if not bucket:
+            del self.levels[level][cell]
+
+    def clear(self):
+        self.levels = []
+        self.items = dict()
+
+    def query(self, box):  # items whose boxes intersect the box
+        x0, y0, x1, y1 = box
+        items = self.items
+        result = []
+        cell_size = self.cell_size
+        for cells in self.levels:
+            if cells:
+                cx0, cx1 = int((x0 - cell_size) // cell_size), int(x1 // cell_size)
+                cy0, cy1 = int((y0 - cell_size) // cell_size), int(y1 // cell_size)
+                if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(cells):
+                    buckets = [bucket for (cx, cy), bucket in cells.items() if cx0 <= cx <= cx1 and cy0 <= cy <= cy1]
+                else:
+                    buckets = [cells[cell] for cell in
+                               ((cx, cy) for cx in range(cx0, cx1 + 1) for cy in range(cy0, cy1 + 1)) if cell in cells]
+                for bucket in buckets:
+                    for item in bucket:
+                        bx0, by0, bx1, by1 = items[item][2]
+                        if bx0 <= x1 and x0 <= bx1 and by0 <= y1 and y0 <= by1:
+                            result.append(item)
+            cell_size *= 2
+        return result
@@ -0,0 +1,63 @@
+from collections import deque
+
+from controllers.AnimationTrack import AnimationTrack
+
+
+class TrackController:
+    # Every target has a queue of tracks played one after another, the first one is sampled from the
+    # controller clock on each update, so the animation speed does not depend on the tick rate
+    def __init__(self, frame_duration=1 / 60):
+        self.time = 0.0
+        self.frame_duration = frame_duration  # lengths passed in frames are scaled by it
+        self.tracks = dict()
+
+    def add_track(self, target, start, end, steps):
+        queue = self.tracks.get(target)
+        if queue is None:
+            queue = self.tracks[target] = deque()
+        t0 = self.time if not queue else max(self.time, queue[-1].end_time())
+        queue.append(AnimationTrack(start, end, t0, steps * self.frame_duration))
+
+    def last_value(self, target, default):  # where the target ends up after its queued tracks
+        queue = self.tracks.get(target)
+        return queue[-1].end if queue else default
+
+    def update(self, dt=None):
+        self.time += self.frame_duration if dt is None else dt
+        time = self.time
+
+        finished = []
+        for target, queue in self.tracks.items():
+            while len(queue) > 1 and queue[0].end_time() <= time:
+                queue.popleft()
+            track = queue[0]
+            if track.end_time() <= time:
+                self.apply(target, track.end)
+                finished.append(target)
+            else:
+                self.apply(target, self.interpolate(track.start, track.end, track.progress(time)))
+
+        for target in finished:
+            del self.tracks[target]
+
+    def finish(self):  # every target straight to the end of its last track
+        for target, queue in self.tracks.items():
+            self.apply(target, queue[-1].end)
+        self.tracks.clear()
+
+    def sample(self, ahead):
+        # Values the targets have ahead seconds after the controller clock, for frames drawn between two updates.
+        # Neither the clock nor the queues change, the next update takes over from the values sampled here.
+        time = self.time + ahead
+        for target, queue in self.tracks.items():
+            for track in queue:
+                if track.end_time() > time:
+                    break
+            self.apply(target, self.interpolate(track.start, track.end, track.progress(time)))
+
+    @staticmethod
+    def interpolate(start, end, progress):
+        return start + (end - start) * progress
+
+    def apply(self, target, value):
+        raise NotImplementedError
@@ -0,0 +1,159 @@
+class TreeLayout:
+    # In-order x-rank layout: x comes from the in-order index, y from the depth, so nodes never overlap
+    # and the whole tree is placed in one linear pass.
+    # In incremental mode x positions keep some slack between in-order neighbours: rotations never change
+    # x, a new leaf is placed between its neighbours and only the smallest enclosing subtree with enough
+    # room is spread out again, while y is recomputed only below nodes marked dirty. Whenever the root ends up
+    # somewhere else than base_position the whole tree is shifted back, which only happens when the root changes
+    # or a spread reaches it.
+    def __init__(self, base_position, radius, x_spacing=1.5, y_spacing=3.0, incremental=False, slack=1.5):
+        self.base_position = base_position
+        self.x_step = int(radius * x_spacing)
+        self.y_step = int(radius * y_spacing)
+        self.incremental = incremental
+        self.slack = slack
+
+        self.dirty = set()
+        self.moved = dict()  # ordered set of nodes whose dest_position changed since the last update
+
+    def in_order_with_depth(self, tree, node=None, depth=0):
+        nil = tree.nil
+        nodes = []
+        depths = []
+        stack = []
+        if node is None:
+            node = tree.root
+        while stack or node is not nil:
+            while node is not nil:
+                stack.append((node, depth))
+                node = node.left
+                depth += 1
+            node, depth = stack.pop()
+            nodes.append(node)
+            depths.append(depth)
+            node = node.right
+            depth += 1
+        return nodes, depths
+
+    def apply(self, tree):
+        self.dirty.clear()
+        nodes, depths = self.in_order_with_depth(tree)
+        if not nodes:
+            self.moved.clear()
+            return []
+
+        x_step = int(self.x_step * self.slack) if self.incremental else self.x_step
+        root_rank = depths.index(0)
+        base_x = self.base_position[0] - root_rank * x_step
+        base_y = self.base_position[1]
+        y_step = self.y_step
+
+        # nodes moved by earlier incremental steps that were not reported yet are kept
+        moved = self.moved
+        for rank, node in enumerate(nodes):
+            dest_position = (base_x + rank * x_step, base_y + depths[rank] * y_step)
+            if node.dest_position != dest_position:
+                node.dest_position = dest_position
+                moved[node] = None
+        self.moved = dict()
+        return list(moved)
+
+    def mark_dirty(self, node):
+        if self.incremental:
+            self.dirty.add(node)
+
+    def insert(self, tree, node):
+        if not self.incremental:
+            return
+
+        nil = tree.nil
+        path = []
+        ancestor = node
+        while ancestor is not nil:
+            path.append(ancestor)
+            ancestor = ancestor.parent
+
+        # x of the nearest in-order neighbours outside of each ancestor's subtree
+        bounds = [None] * len(path)
+        left_x = right_x = None
+        for i in range(len(path) - 1, -1, -1):
+            bounds[i] = (left_x, right_x)
+            if i > 0:
+                if path[i - 1] is path[i].right:
+                    left_x = path[i].dest_position[0]
+                else:
+                    right_x = path[i].dest_position[0]
+
+        wide_step = int(self.x_step * self.slack)
+        levels = max(1, len(path) - 1)
+        for i, window in enumerate(path):
+            left_x, right_x = bounds[i]
+            if left_x is None and right_x is None:
+                nodes, depths = self.in_order_with_depth(tree, window)
+                root_x = window.dest_position[0] if window is not node else self.base_position[0]
+                self._spread(nodes, root_x - depths.index(0) * wide_step, wide_step)
+                break
+            elif right_x is None:
+                nodes, _ = self.in_order_with_depth(tree, window)
+                self._spread(nodes, left_x + wide_step, wide_step)
+                break
+            elif left_x is None:
+                nodes, _ = self.in_order_with_depth(tree, window)
+                self._spread(nodes, right_x - len(nodes) * wide_step, wide_step)
+                break
+
+            # allowed density shrinks from 1 at the leaf to 1 / slack at the root, as in a packed memory array
+            density = 1 - (1 - 1 / self.slack) * i / levels
+            if (window.subtree_size + 1) * self.x_step <= density * (right_x - left_x):
+                nodes, _ = self.in_order_with_depth(tree, window)
+                gap = (right_x - left_x) // (len(nodes) + 1)
+                self._spread(nodes, left_x + gap, gap)
+                break
+
+        self.dirty.add(node)
+
+    def _spread(self, nodes, first_x, gap):
+        for i, node in enumerate(nodes):
+            x = first_x + i * gap
+            if node.dest_position[0] != x:
+                node.dest_position = (x, node.dest_position[1])
+                self.moved[node] = None
+
+    def update(self, tree):
+        if not self.incremental:
+            return self.apply(tree)
+
+        nil = tree.nil
+        base_y = self.base_position[1]
+        y_step = self.y_step
+
+        # top-down from every dirty node, descending only while the depth of a node actually changed,
+        # which is enough as long as every node that got a new parent has been marked dirty
+        for dirty_node in sorted(self.dirty, key=tree.depth):
+            stack = [dirty_node]
+            while stack:
+                node = stack.pop()
+                y = base_y if node.parent is nil else node.parent.dest_position[1] + y_step
+                if node.dest_position[1] != y or node is dirty_node:
+                    if node.dest_position[1] != y:
+                        node.dest_position = (node.dest_position[0], y)
+                        self.moved[node] = None
+                    if node.left is not nil:
+                        stack.append(node.left)
+                    if node.right is not nil:
+                        stack.append(node.right)
+        self.dirty.clear()
+        self._recenter(tree)
+
+        moved = list(self.moved)
+        self.moved.clear()
+        return moved
+
+    def _recenter(self, tree):
+        if tree.root is tree.nil:
+            return
+        shift = self.base_position[0] - tree.root.dest_position[0]
+        if shift:
+            for node in tree:
+                node.dest_position = (node.dest_position[0] + shift, node.dest_position[1])
+                self.moved[node] = None
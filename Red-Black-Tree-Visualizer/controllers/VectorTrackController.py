@@ -0,0 +1,131 @@
+from collections import deque
+
+from controllers.AnimationTrack import AnimationTrack
+from controllers.TrackController import TrackController
+
+try:
+    import numpy as np
+except ImportError:  # the pure Python TrackController is used instead
+    np = None
+
+
+class VectorTrackController(TrackController):
+    # The playing track of every target is a row of NumPy arrays, all of them are eased with
+    # PathGenerator.bezier_ease and interpolated in one vectorized step per update.
+    # self.tracks only keeps the tracks queued behind the playing ones.
+    dimension = 1
+
+    def __init__(self, frame_duration=1 / 60, capacity=64):
+        super().__init__(frame_duration)
+        self.size = 0
+        self.targets = []
+        self.slots = dict()  # target -> row
+        self.start = np.zeros((capacity, self.dimension))
+        self.end = np.zeros((capacity, self.dimension))
+        self.t0 = np.zeros(capacity)
+        self.duration = np.zeros(capacity)
+
+    def add_track(self, target, start, end, steps):
+        duration = steps * self.frame_duration
+        row = self.slots.get(target)
+        if row is None:
+            if self.size == len(self.t0):
+                self._grow()
+            row = self.size
+            self.size += 1
+            self.targets.append(target)
+            self.slots[target] = row
+            self._set_row(row, start, end, self.time, duration)
+            return
+
+        queue = self.tracks.get(target)
+        if queue is None:
+            queue = self.tracks[target] = deque()
+        last_end_time = queue[-1].end_time() if queue else float(self.t0[row] + self.duration[row])
+        queue.append(AnimationTrack(start, end, max(self.time, last_end_time), duration))
+
+    def last_value(self, target, default):
+        queue = self.tracks.get(target)
+        if queue:
+            return queue[-1].end
+        row = self.slots.get(target)
+        if row is None:
+            return default
+        return float(self.end[row, 0]) if self.dimension == 1 else tuple(self.end[row].tolist())
+
+    def update(self, dt=None):
+        self.time += self.frame_duration if dt is None else dt
+        n = self.size
+        if not n:
+            return
+        time = self.time
+
+        # queued tracks take over the row once the playing one is over
+        for target, queue in list(self.tracks.items()):
+            row = self.slots[target]
+            while queue and self.t0[row] + self.duration[row] <= time:
+                track = queue.popleft()
+                self._set_row(row, track.start, track.end, track.t0, track.duration)
+            if not queue:
+                del self.tracks[target]
+
+        done, values = self._values(time)
+        self.apply_all(self.targets, values)
+
+        if done.any():
+            keep = ~done
+            size = int(keep.sum())
+            for array in (self.start, self.end, self.t0, self.duration):
+                array[:size] = array[:n][keep]
+            self.targets = [target for target, kept in zip(self.targets, keep.tolist()) if kept]
+            self.slots = {target: row for row, target in enumerate(self.targets)}
+            self.size = size
+
+    def finish(self):
+        for target in self.targets:
+            self.apply(target, self.last_value(target, None))
+        self.tracks.clear()
+        self.targets = []
+        self.slots = dict()
+        self.size = 0
+
+    def sample(self, ahead):
+        # Only the playing tracks are sampled, one that is over by then stays at its end until the next update
+        if self.size:
+            self.apply_all(self.targets, self._values(self.time + ahead)[1])
+
+    def _values(self, time):
+        n = self.size
+        t0, duration, start, end = self.t0[:n], self.duration[:n], self.start[:n], self.end[:n]
+        done = t0 + duration <= time
+        t = np.divide(time - t0, duration, out=np.ones(n), where=duration > 0)
+        np.clip(t, 0.0, 1.0, out=t)
+        t *= t * (3 - 2 * t)
+        t *= t * (3 - 2 * t)
+        values = start + (end - start) * t[:, None]
+        values[done] = end[done]
+        return done, values
+
+    def apply_all(self, targets, values):
+        apply = self.apply
+        if self.dimension == 1:
+            for target, value in zip(targets, values[:, 0].tolist()):
+                apply(target, value)
+        else:
+            for target, value in zip(targets, values.tolist()):
+                apply(target, tuple(value))
+
+    def _set_row(self, row, start, end, t0, duration):
+        self.start[row] = start
+        self.end[row] = end
+        self.t0[row] = t0
+        self.duration[row] = duration
+
+    def _grow(self):
+        self.start = np.concatenate((self.start, np.zeros_like(self.start)))
+        self.end = np.concatenate((self.end, np.zeros_like(self.end)))
+        self.t0 = np.concatenate((self.t0, np.zeros_like(self.t0)))
+        self.duration = np.concatenate((self.duration, np.zeros_like(self.duration)))
+
+
+DefaultTrackController = VectorTrackController if np is not None else TrackController
@@ -0,0 +1,373 @@
+from functools import cmp_to_key
+
+from rbt.RbtBaseNode import RbtBaseNode
+from rbt.RedBlackTree import RedBlackTree, greater
+from utility.enums import RbtColor
+
+RED = RbtColor.RED.value
+BLACK = RbtColor.BLACK.value
+
+
+class PersistentRedBlackTree(RedBlackTree):
+    # One version of a red-black tree, never changed once it is made. insert and delete copy the nodes on the search
+    # path and the few next to it that the fixup recolors or rotates, O(log n) of them, and return a new version
+    # sharing every other node with this one, so older versions stay whole and any thread can read any of them
+    # without a lock. Shared nodes can not know their parent, it is left at nil, so the queries that follow parent
+    # links go down from the root instead. Versions have no observer.
+    def __init__(self, comparator_func=greater, node_class=RbtBaseNode):
+        super().__init__(comparator_func, node_class=node_class)
+
+    @classmethod
+    def from_sorted(cls, values, *args, **kwargs):
+        return cls(*args, **kwargs).load_sorted(values)
+
+    @classmethod
+    def from_tree(cls, tree):  # version with the shape, colors and values of a mutable tree
+        version = cls(tree.comparator_func, tree.node_class)
+        return version._version(version._copy_subtree(tree.root, tree.nil))
+
+    def _version(self, root):
+        version = object.__new__(type(self))
+        version.node_class = self.node_class
+        version.nil = self.nil
+        version.root = root
+        version.comparator_func = self.comparator_func
+        version.observer = None
+        return version
+
+    def _clone(self, node):
+        clone = self.node_class(node.value, self.nil, node.color, node.quantity, node.subtree_size)
+        clone.left = node.left
+        clone.right = node.right
+        return clone
+
+    def _copy_subtree(self, node, nil):
+        if node is nil:
+            return self.nil
+        clone = self._clone(node)
+        clone.left = self._copy_subtree(node.left, nil)
+        clone.right = self._copy_subtree(node.right, nil)
+        return clone
+
+    @staticmethod
+    def _relink(parent, old, new, root):  # new takes the place of old under parent, returns the root
+        if parent is None:
+            return new
+        if parent.left is old:
+            parent.left = new
+        else:
+            parent.right = new
+        return root
+
+    @staticmethod
+    def _rotate_left(node):  # the right child goes up, both have to be copies, returns it
+        top = node.right
+        node.right = top.left
+        top.left = node
+        top.subtree_size = node.subtree_size
+        node.subtree_size = node.left.subtree_size + node.right.subtree_size + node.quantity
+        return top
+
+    @staticmethod
+    def _rotate_right(node):
+        top = node.left
+        node.left = top.right
+        top.right = node
+        top.subtree_size = node.subtree_size
+        node.subtree_size = node.left.subtree_size + node.right.subtree_size + node.quantity
+        return top
+
+    def _copy_path(self, key, size_change):
+        # Copies of the nodes from the root down to the one holding key, or to where it would hang, each linked to
+        # the next and with size_change added to its subtree size
+        nil = self.nil
+        comparator_func = self.comparator_func
+        path = []
+        node = self.root
+        parent = None
+        while node is not nil:
+            copy = self._clone(node)
+            copy.subtree_size += size_change
+            if parent is not None:
+                if parent.left is node:
+                    parent.left = copy
+                else:
+                    parent.right = copy
+            path.append(copy)
+            if comparator_func(node.value, key):
+                node = node.left
+            elif comparator_func(key, node.value):
+                node = node.right
+            else:
+                break
+            parent = copy
+        return path
+
+    # Updates, each one returns a new version
+
+    def insert(self, key):
+        path = self._copy_path(key, 1)
+        if path and not self.comparator_func(path[-1].value, key) and not self.comparator_func(key, path[-1].value):
+            path[-1].quantity += 1
+            return self._version(path[0])
+
+        new_node = self.node_class(key, self.nil, RED)
+        if path:
+            if self.comparator_func(path[-1].value, key):
+                path[-1].left = new_node
+            else:
+                path[-1].right = new_node
+        path.append(new_node)
+        return self._version(self._insert_fixup(path))
+
+    def _insert_fixup(self, path):  # path of copies ending at the new node, returns the new root
+        root = path[0]
+        i = len(path) - 1
+        while i >= 2 and path[i - 1].color == RED:
+            node, parent, grand = path[i], path[i - 1], path[i - 2]
+            great = path[i - 3] if i >= 3 else None
+            if parent is grand.left:
+                uncle = grand.right
+                if uncle.color == RED:
+                    grand.right = uncle = self._clone(uncle)
+                    uncle.color = parent.color = BLACK
+                    grand.color = RED
+                    i -= 2
+                    continue
+                if node is parent.right:
+                    grand.left = parent = self._rotate_left(parent)
+                parent.color = BLACK
+                grand.color = RED
+                root = self._relink(great, grand, self._rotate_right(grand), root)
+            else:
+                uncle = grand.left
+                if uncle.color == RED:
+                    grand.left = uncle = self._clone(uncle)
+                    uncle.color = parent.color = BLACK
+                    grand.color = RED
+                    i -= 2
+                    continue
+                if node is parent.left:
+                    grand.right = parent = self._rotate_right(parent)
+                parent.color = BLACK
+                grand.color = RED
+                root = self._relink(great, grand, self._rotate_left(grand), root)
+            break
+        root.color = BLACK
+        return root
+
+    def insert_iterable(self, key_list):
+        version = self
+        for key in key_list:
+            version = version.insert(key)
+        return version
+
+    def delete(self, node):
+        return self.delete_by_value(node.value)
+
+    def delete_all(self, node):
+        return self.delete_all_by_value(node.value)
+
+    def delete_by_value(self, value):
+        node = self.search(value)
+        if node is self.nil:
+            raise ValueError('Value not in the structure')
+        if node.quantity > 1:
+            path = self._copy_path(value, -1)
+            path[-1].quantity -= 1
+            return self._version(path[0])
+        return self._remove(value, node.quantity)
+
+    def delete_all_by_value(self, value):
+        node = self.search(value)
+        if node is self.nil:
+            raise ValueError('Value not in the structure')
+        return self._remove(value, node.quantity)
+
+    def _remove(self, value, quantity):
+        nil = self.nil
+        path = self._copy_path(value, -quantity)
+        target = path[-1]
+        if target.left is not nil and target.right is not nil:
+            # The successor moves into the copy of the target and is taken out from lower down instead
+            node = target.right
+            parent = target
+            successor_quantity = self.minimum(node).quantity
+            while node is not nil:
+                copy = self._clone(node)
+                copy.subtree_size -= successor_quantity
+                if parent.left is node:
+                    parent.left = copy
+                else:
+                    parent.right = copy
+                path.append(copy)
+                parent = copy
+                node = node.left
+            removed = path[-1]
+            target.value, target.quantity = removed.value, removed.quantity
+        removed = path.pop()
+
+        child = removed.left if removed.left is not nil else removed.right
+        root = self._relink(path[-1] if path else None, removed, child, path[0] if path else child)
+        if removed.color == BLACK:
+            root = self._delete_fixup(child, path, root)
+        return self._version(root)
+
+    def _delete_fixup(self, node, path, root):
+        # node carries an extra black, path holds the copies from the root down to its parent
+        owned = False  # the child moved up by the removal is still shared, the nodes taken off the path are copies
+        while node is not root and node.color == BLACK:
+            parent = path[-1]
+            grand = path[-2] if len(path) >= 2 else None
+            if node is parent.left:
+                parent.right = sibling = self._clone(parent.right)
+                if sibling.color == RED:
+                    sibling.color = BLACK
+                    parent.color = RED
+                    root = self._relink(grand, parent, self._rotate_left(parent), root)
+                    path.insert(len(path) - 1, sibling)
+                    grand = sibling
+                    parent.right = sibling = self._clone(parent.right)
+                if sibling.left.color == BLACK and sibling.right.color == BLACK:
+                    sibling.color = RED
+                    node = path.pop()
+                    owned = True
+                    continue
+                if sibling.right.color == BLACK:
+                    sibling.left = self._clone(sibling.left)
+                    sibling.left.color = BLACK
+                    sibling.color = RED
+                    parent.right = sibling = self._rotate_right(sibling)
+                sibling.color = parent.color
+                parent.color = BLACK
+                sibling.right = self._clone(sibling.right)
+                sibling.right.color = BLACK
+                root = self._relink(grand, parent, self._rotate_left(parent), root)
+            else:
+                parent.left = sibling = self._clone(parent.left)
+                if sibling.color == RED:
+                    sibling.color = BLACK
+                    parent.color = RED
+                    root = self._relink(grand, parent, self._rotate_right(parent), root)
+                    path.insert(len(path) - 1, sibling)
+                    grand = sibling
+                    parent.left = sibling = self._clone(parent.left)
+                if sibling.left.color == BLACK and sibling.right.color == BLACK:
+                    sibling.color = RED
+                    node = path.pop()
+                    owned = True
+                    continue
+                if sibling.left.color == BLACK:
+                    sibling.right = self._clone(sibling.right)
+                    sibling.right.color = BLACK
+                    sibling.color = RED
+                    parent.left = sibling = self._rotate_left(sibling)
+                sibling.color = parent.color
+                parent.color = BLACK
+                sibling.left = self._clone(sibling.left)
+                sibling.left.color = BLACK
+                root = self._relink(grand, parent, self._rotate_right(parent), root)
+            return root
+
+        if node.color == RED:
+            if not owned:
+                black = self._clone(node)
+                root = self._relink(path[-1] if path else None, node, black, root)
+                node = black
+            node.color = BLACK
+        return root
+
+    def clear(self):
+        return self._version(self.nil)
+
+    def bulk_load(self, iterable):
+        if self.comparator_func is greater:
+            values = sorted(iterable)
+        else:
+            comparator_func = self.comparator_func
+            values = sorted(iterable, key=cmp_to_key(
+                lambda x, y: 1 if comparator_func(x, y) else -1 if comparator_func(y, x) else 0
+            ))
+        return self.load_sorted(values)
+
+    def load_sorted(self, values):  # a balanced version of this one's values and the sorted ones, all new nodes
+        comparator_func = self.comparator_func
+        runs = []
+        for value in values:
+            if runs and not comparator_func(value, runs[-1][0]):
+                runs[-1][1] += 1
+            else:
+                runs.append([value, 1])
+
+        merged = []
+        existing = [[node.value, node.quantity] for node in self]
+        i = 0
+        for value, quantity in runs:
+            while i < len(existing) and comparator_func(value, existing[i][0]):
+                merged.append(existing[i])
+                i += 1
+            if i < len(existing) and not comparator_func(existing[i][0], value):
+                existing[i][1] += quantity
+            else:
+                merged.append([value, quantity])
+        merged.extend(existing[i:])
+
+        nodes = []
+        for value, quantity in merged:
+            node = self.node_class(value, self.nil, RED)
+            node.quantity = quantity
+            nodes.append(node)
+        version = self._version(self.nil)
+        version.root = version._build_balanced(nodes, 0, len(nodes), self.nil, 0, len(nodes).bit_length() - 1)
+        for node in nodes:
+            node.parent = self.nil
+        return version
+
+    # Queries that would follow parent links
+
+    def successor(self, node):
+        return self.upper_bound(node.value) if node is not self.nil else self.nil
+
+    def predecessor(self, node):
+        if node is self.nil:
+            return self.nil
+        nil = self.nil
+        comparator_func = self.comparator_func
+        candidate = nil
+        current = self.root
+        while current is not nil:
+            if comparator_func(node.value, current.value):
+                candidate = current
+                current = current.right
+            else:
+                current = current.left
+        return candidate
+
+    def depth(self, node):
+        nil = self.nil
+        comparator_func = self.comparator_func
+        depth = 0
+        current = self.root
+        while current is not nil:
+            depth += 1
+            if comparator_func(current.value, node.value):
+                current = current.left
+            elif comparator_func(node.value, current.value):
+                current = current.right
+            else:
+                return depth
+        return 0
+
+    def get_rank(self, node):
+        if node is self.nil:
+            raise ValueError("Node not found in the container")
+        return self.rank(node.value)
+
+    def get_edges_set(self):
+        nil = self.nil
+        edges = set()
+        for node in self:
+            for child in (node.left, node.right):
+                if child is not nil:
+                    edges.add((child, node) if child.value < node.value else (node, child))
+        return edges
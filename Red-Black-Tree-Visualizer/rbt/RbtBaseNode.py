@@ -0,0 +1,30 @@
+from utility.enums import RbtColor
+
+
+class RbtBaseNode:
+    # Fixed attribute layout without a per-instance __dict__, trees of millions of nodes stay compact
+    __slots__ = ('value', 'quantity', 'parent', 'right', 'left', 'color', 'subtree_size')
+
+    def __init__(self, value, nil, color=RbtColor.BLACK.value, quantity=1, subtree_size=1):
+        self.value = value
+        self.quantity = quantity
+        self.parent = nil
+        self.right = nil
+        self.left = nil
+        self.color = color
+        self.subtree_size = subtree_size  # including the node itself
+
+    def __str__(self):
+        return f'({self.value}, {self.quantity})'
+
+    def __repr__(self):
+        return f'({self.value}, {self.quantity}, {"Black" if self.color else "Red"}, {self.subtree_size})'
+
+    def is_left_child(self):
+        return self is self.parent.left
+
+    def is_right_child(self):
+        return self is self.parent.right
+
+    def set_color(self, color):
+        self.color = color
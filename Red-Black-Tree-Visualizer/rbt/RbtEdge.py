@@ -1,6 +1,6 @@
 from pygame import Vector2
 
-from utility.gui import drawAALine
+from utility.gui import drawAALine, drawLine
 
 
 class RbtEdge:
@@ -17,8 +17,13 @@ class RbtEdge:
 
     def update_length_multiplier(self, length_multiplier):
         self.length_multiplier = length_multiplier
+        self.visualizer.edge_changed(self)
 
-    def draw(self, thickness=3.0):
+    def get_box(self):
+        (x1, y1), (x2, y2) = self.node1.position, self.node2.position
+        return min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)
+
+    def draw(self, thickness=3.0, antialiased=True):
         if self.length_multiplier < 0.001:
             return
 
@@ -28,4 +33,7 @@ class RbtEdge:
             position1.move_towards_ip(position2, int(position_diff * (1.0 - self.length_multiplier) / 2))
             position2.move_towards_ip(position1, int(position_diff * (1.0 - self.length_multiplier) / 2))
 
-        drawAALine(self.visualizer, position1, position2, thickness)
+        if antialiased:
+            drawAALine(self.visualizer, position1, position2, thickness)
+        else:
+            drawLine(self.visualizer, position1, position2)
@@ -1,27 +1,22 @@
-import pygame
+from rbt.RbtBaseNode import RbtBaseNode
+from utility.gui import renderCircle, renderLabeledCircle, renderPoint, renderTextWithOutline
+from utility.enums import RbtColor, Color, Detail
 
-from utility.gui import drawTextWithOutline
-from utility.enums import RbtColor, Color
 
+class RbtNode(RbtBaseNode):
+    __slots__ = ('visualizer', 'position', 'dest_position', 'radius', 'radius_mult', 'outline_color',
+                 'additional_circle_radius_mult', 'additional_circle_color', 'recently_added', 'being_deleted')
 
-class RbtNode:
     def __init__(self, value, nil, color=RbtColor.BLACK.value, quantity=1, subtree_size=1, visualizer=None,
                  position=(0, 0), dest_position=(0, 0), radius=0):
-        self.value = value
-        self.quantity = quantity
-        self.parent = nil
-        self.right = nil
-        self.left = nil
-        self.color = color
-        self.subtree_size = subtree_size  # including the node itself
-        self.nil = nil
+        super().__init__(value, nil, color, quantity, subtree_size)
 
         self.visualizer = visualizer
         self.position = position
         self.dest_position = dest_position
         self.radius = radius
         self.radius_mult = 1.0
-        self.child_side_offset_mult = 2
+        self.outline_color = Color.OUTLINE_BLACK.value
 
         self.additional_circle_radius_mult = 0.0
         self.additional_circle_color = Color.BLACK.value
@@ -29,82 +24,66 @@ class RbtNode:
         self.recently_added = True
         self.being_deleted = False
 
-
-
-    def __str__(self):
-        return f'({self.value}, {self.quantity})'
-
     def __repr__(self):
         return f'({self.value}, {self.quantity}, {"Black" if self.color else "Red"}, {self.subtree_size}, {self.position}, {self.radius})'
 
     def update_position(self, position):
         self.position = position
+        self.visualizer.node_moved(self)
+
+    def get_box(self):  # world space bounds, large enough for the highlighted node and its value
+        extent = self.radius * 1.2
+        return (self.position[0] - extent, self.position[1] - extent,
+                self.position[0] + extent, self.position[1] + extent)
 
     def clear_additional_circle(self):
         self.additional_circle_radius_mult = 0
 
-    def is_left_child(self):
-        return self is self.parent.left
-
-    def is_right_child(self):
-        return self is self.parent.right
-
     def set_additional_circle(self, radius, color=Color.BLACK.value):
         self.additional_circle_radius_mult = radius
         self.additional_circle_color = color
 
-    def set_color(self, color):
-        if self.color == color:
-            return
-        else:
-            if self.additional_circle_radius_mult < 1.0:
-                self.set_additional_circle(
-                    1.0, Color.BLACK.value if self.color == RbtColor.BLACK.value else Color.RED.value
-                )
-            self.color = color
-            if self not in self.visualizer.animation_controller.node_update_set:
-                self.visualizer.animation_controller.node_update_set.add(self)
-
     def get_transformed_position(self):
         zoom = self.visualizer.zoom
         x_transformed = int((self.position[0] + self.visualizer.x_offset) * zoom)
         y_transformed = int((self.position[1] + self.visualizer.y_offset) * zoom)
         return x_transformed, y_transformed
 
-    def draw(self):
+    def get_blits(self, detail=Detail.FULL):  # (surface, position) pairs drawing the node from the bottom layer up
         zoom = self.visualizer.zoom
         x_transformed, y_transformed = self.get_transformed_position()
+        radius = int(self.radius * self.radius_mult * zoom)
+        color = Color.BLACK.value if self.color == RbtColor.BLACK.value else Color.RED.value
+        font_size = int(self.radius * 1.5 * zoom)
 
-        # Outline
-        for i in range(1):
-            pygame.draw.circle(
-                self.visualizer.screen, Color.OUTLINE_BLACK.value, (x_transformed, y_transformed),
-                int(self.radius * self.radius_mult * zoom),
-            )
+        if detail is Detail.POINTS or detail is Detail.SUBTREES:
+            size = max(1, int(2 * self.radius * zoom))
+            return [(renderPoint(color, size), (x_transformed - size // 2, y_transformed - size // 2))]
 
+        # Whole node as a single sprite, unless the additional circle has to go between the filling and the value
+        if self.additional_circle_radius_mult <= 0 and detail is Detail.FULL:
+            sprite = renderLabeledCircle(color, radius, str(self.value), 'Helvetica', font_size,
+                                         Color.WHITE.value, 1.8 * self.radius * zoom)
+            if sprite:
+                return [(sprite, (x_transformed - radius, y_transformed - radius))]
 
         # Filling
-        pygame.draw.circle(
-            self.visualizer.screen,
-            Color.BLACK.value if self.color == RbtColor.BLACK.value else Color.RED.value,
-            (x_transformed, y_transformed),
-            int(self.radius * self.radius_mult * zoom),
-            0
-        )
+        blits = [(renderCircle(color, radius), (x_transformed - radius, y_transformed - radius))]
 
         # Additional circle
         if self.additional_circle_radius_mult > 0:
-            pygame.draw.circle(
-                self.visualizer.screen,
-                self.additional_circle_color,
-                (x_transformed, y_transformed),
-                int(self.radius * self.additional_circle_radius_mult * self.radius_mult * zoom),
-                0
-            )
-
+            radius = int(self.radius * self.additional_circle_radius_mult * self.radius_mult * zoom)
+            blits.append((
+                renderCircle(self.additional_circle_color, radius), (x_transformed - radius, y_transformed - radius)
+            ))
 
         # Value
-        drawTextWithOutline(self.visualizer, str(self.value), 'Helvetica', int(self.radius * 1.5 * zoom),
-                            Color.WHITE.value, x_transformed, y_transformed, 1.8 * self.radius * zoom)
-
+        if detail is not Detail.FULL:
+            return blits
+        label = renderTextWithOutline(str(self.value), 'Helvetica', font_size, Color.WHITE.value,
+                                      1.8 * self.radius * zoom)
+        blits.append((label, label.get_rect(center=(x_transformed, y_transformed))))
+        return blits
 
+    def draw(self):
+        self.visualizer.screen.blits(self.get_blits(), doreturn=False)
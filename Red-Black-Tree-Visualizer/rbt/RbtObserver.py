@@ -0,0 +1,47 @@
+class RbtObserver:
+    # Structural events emitted by RedBlackTree, all hooks are no-ops by default
+
+    def on_visit(self, node):
+        pass
+
+    def on_edges_changed(self, added, removed):
+        pass
+
+    def on_insert(self, node):
+        pass
+
+    def on_quantity_changed(self, node, old_quantity):
+        pass
+
+    def on_rotate(self, node):
+        pass
+
+    def on_recolor(self, node, old_color):
+        pass
+
+    def on_fixup_end(self):
+        pass
+
+    def on_delete_begin(self, node):
+        pass
+
+    def on_transplant(self, x, y):
+        pass
+
+    def on_unlink(self, node):
+        pass
+
+    def on_bulk_load(self, nodes):
+        pass
+
+    def on_clear(self, nodes):  # the nodes were dropped at once, without the steps that took them out
+        pass
+
+    def on_operation_end(self):
+        pass
+
+    def on_batch_begin(self):
+        pass
+
+    def on_batch_end(self):
+        pass
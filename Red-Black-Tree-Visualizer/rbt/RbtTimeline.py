@@ -0,0 +1,276 @@
+from bisect import bisect_right
+
+from rbt.RbtObserver import RbtObserver
+
+
+def node_state(node):
+    return node.parent, node.left, node.right, node.color, node.quantity, node.subtree_size
+
+
+def set_node_state(node, state):
+    node.parent, node.left, node.right, color, node.quantity, node.subtree_size = state
+    node.set_color(color)
+
+
+class Timeline(RbtObserver):
+    # Undo and redo over the operations of a tree. It goes in front of the observer the tree already has and passes
+    # every event on to it. The state of every node in the tree is mirrored. After each operation, a whole batch
+    # counting as one, it keeps the before and after states of the nodes the operation touched, O(log n) of them
+    # for an insert or a delete. Every keyframe_interval operations a copy of the mirror is kept, so a far jump
+    # restores the cheapest keyframe and steps from there instead of stepping through every operation in between.
+    # The timeline has to see every change, so the tree can not be changed with its observer taken away.
+    def __init__(self, tree, keyframe_interval=1000):
+        self.tree = tree
+        self.observer = tree.observer
+        tree.observer = self
+        self.keyframe_interval = keyframe_interval
+
+        self.state = {node: node_state(node) for node in tree.get_nodes()}
+        self.root = tree.root
+        self.deltas = []  # (root before, root after, [(node, state before, state after)]) per operation
+        self.costs = [0]  # node states written up to each position, to weigh stepping against a keyframe
+        self.keyframe_positions = [0]
+        self.keyframes = [(tree.root, dict(self.state))]
+        self.position = 0  # operations applied, the ones after it can be redone
+
+        self.touched = dict()
+        self.removed = set()
+        self.touch_all = False
+        self.batch_depth = 0
+
+    def __len__(self):
+        return len(self.deltas)
+
+    def can_undo(self):
+        return self.position > 0
+
+    def can_redo(self):
+        return self.position < len(self.deltas)
+
+    def undo(self, steps=1):
+        self.seek(self.position - steps)
+
+    def redo(self, steps=1):
+        self.seek(self.position + steps)
+
+    def seek(self, position):
+        # The observer hears of the jump as dropped nodes, recolored nodes and one bulk load of the added ones
+        position = max(0, min(position, len(self.deltas)))
+        if position == self.position:
+            return
+        old_states = dict()
+        costs = self.costs
+        cost = abs(costs[position] - costs[self.position])
+        best = None
+        i = bisect_right(self.keyframe_positions, position)
+        for k in (i - 1, i):
+            if k < len(self.keyframes):
+                keyframe_cost = len(self.keyframes[k][1]) + abs(costs[position] - costs[self.keyframe_positions[k]])
+                if keyframe_cost < cost:
+                    cost, best = keyframe_cost, k
+        if best is not None:
+            self._restore_keyframe(best, old_states)
+
+        deltas = self.deltas
+        while self.position > position:
+            self.position -= 1
+            root, _, changes = deltas[self.position]
+            for node, before, _ in reversed(changes):
+                self._set_state(node, before, old_states)
+            self.tree.root = self.root = root
+        while self.position < position:
+            _, root, changes = deltas[self.position]
+            for node, _, after in changes:
+                self._set_state(node, after, old_states)
+            self.tree.root = self.root = root
+            self.position += 1
+        self._notify(old_states)
+
+    def _set_state(self, node, state, old_states):
+        if node not in old_states:
+            old_states[node] = self.state.get(node)
+        if state is None:
+            del self.state[node]
+        else:
+            set_node_state(node, state)
+            self.state[node] = state
+
+    def _restore_keyframe(self, k, old_states):
+        root, states = self.keyframes[k]
+        for node in self.state:
+            if node not in states:
+                old_states.setdefault(node, self.state[node])
+        for node, state in states.items():
+            if node not in old_states:
+                old_states[node] = self.state.get(node)
+            set_node_state(node, state)
+        self.state = dict(states)
+        self.tree.root = self.root = root
+        self.position = self.keyframe_positions[k]
+
+    def _notify(self, old_states):
+        observer = self.observer
+        if observer is None:
+            return
+        dropped, added, recolored = [], [], []
+        for node, old in old_states.items():
+            new = self.state.get(node)
+            if old is None:
+                if new is not None:
+                    added.append(node)
+            elif new is None:
+                dropped.append(node)
+            elif new[3] != old[3]:
+                recolored.append((node, old[3]))
+
+        observer.on_clear(dropped)
+        for node, old_color in recolored:
+            observer.on_recolor(node, old_color)
+        observer.on_bulk_load(added)
+        observer.on_fixup_end()
+        observer.on_operation_end()
+
+    def _record(self):
+        tree = self.tree
+        if self.touch_all:
+            alive = set(tree.get_nodes())
+            touched = set(self.state) | alive
+            removed = set(self.state) - alive
+        else:
+            touched, removed = self.touched, self.removed
+
+        changes = []
+        for node in touched:
+            before = self.state.get(node)
+            after = None if node in removed else node_state(node)
+            if before == after:
+                continue
+            changes.append((node, before, after))
+            if after is None:
+                del self.state[node]
+            else:
+                self.state[node] = after
+        self.touched = dict()
+        self.removed = set()
+        self.touch_all = False
+        if not changes and tree.root is self.root:
+            return
+
+        # A new operation after an undo drops the ones that could have been redone
+        del self.deltas[self.position:]
+        del self.costs[self.position + 1:]
+        k = bisect_right(self.keyframe_positions, self.position)
+        del self.keyframe_positions[k:]
+        del self.keyframes[k:]
+
+        self.deltas.append((self.root, tree.root, changes))
+        self.costs.append(self.costs[-1] + len(changes))
+        self.root = tree.root
+        self.position += 1
+        if self.position % self.keyframe_interval == 0:
+            self.keyframe_positions.append(self.position)
+            self.keyframes.append((tree.root, dict(self.state)))
+
+    # Observer hooks, each one notes the nodes the event touches and passes it on
+
+    def on_visit(self, node):
+        self.touched[node] = None
+        if self.observer is not None:
+            self.observer.on_visit(node)
+
+    def on_edges_changed(self, added, removed):
+        touched = self.touched
+        for node1, node2 in added:
+            touched[node1] = touched[node2] = None
+        for node1, node2 in removed:
+            touched[node1] = touched[node2] = None
+        if self.observer is not None:
+            self.observer.on_edges_changed(added, removed)
+
+    def on_insert(self, node):
+        self.touched[node] = None
+        if self.observer is not None:
+            self.observer.on_insert(node)
+
+    def on_quantity_changed(self, node, old_quantity):
+        nil = self.tree.nil
+        ancestor = node
+        while ancestor is not nil:  # the subtree sizes above it changed as well
+            self.touched[ancestor] = None
+            ancestor = ancestor.parent
+        if self.observer is not None:
+            self.observer.on_quantity_changed(node, old_quantity)
+
+    def on_rotate(self, node):
+        # The edge between the node and the parent it went up over is kept, so on_edges_changed does not note them.
+        # That parent is now one of its children, both are noted as it takes no more to tell which one
+        nil = self.tree.nil
+        touched = self.touched
+        touched[node] = None
+        for child in (node.left, node.right):
+            if child is not nil:
+                touched[child] = None
+        if self.observer is not None:
+            self.observer.on_rotate(node)
+
+    def on_recolor(self, node, old_color):
+        self.touched[node] = None
+        if self.observer is not None:
+            self.observer.on_recolor(node, old_color)
+
+    def on_fixup_end(self):
+        if self.observer is not None:
+            self.observer.on_fixup_end()
+
+    def on_delete_begin(self, node):
+        # Unlinking shrinks the subtree sizes above the node and, with two children, above its successor
+        nil = self.tree.nil
+        touched = self.touched
+        ancestor = node
+        while ancestor is not nil:
+            touched[ancestor] = None
+            ancestor = ancestor.parent
+        if node.left is not nil and node.right is not nil:
+            successor = node.right
+            while successor is not nil:
+                touched[successor] = None
+                successor = successor.left
+        if self.observer is not None:
+            self.observer.on_delete_begin(node)
+
+    def on_transplant(self, x, y):
+        if self.observer is not None:
+            self.observer.on_transplant(x, y)
+
+    def on_unlink(self, node):
+        self.removed.add(node)
+        if self.observer is not None:
+            self.observer.on_unlink(node)
+
+    def on_bulk_load(self, nodes):
+        self.touch_all = True
+        if self.observer is not None:
+            self.observer.on_bulk_load(nodes)
+
+    def on_clear(self, nodes):
+        self.touch_all = True
+        if self.observer is not None:
+            self.observer.on_clear(nodes)
+
+    def on_operation_end(self):
+        if self.observer is not None:
+            self.observer.on_operation_end()
+        if not self.batch_depth:
+            self._record()
+
+    def on_batch_begin(self):
+        self.batch_depth += 1
+        if self.observer is not None:
+            self.observer.on_batch_begin()
+
+    def on_batch_end(self):
+        if self.observer is not None:
+            self.observer.on_batch_end()
+        self.batch_depth -= 1
+        if not self.batch_depth:
+            self._record()
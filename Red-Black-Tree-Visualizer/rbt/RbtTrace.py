@@ -0,0 +1,367 @@
+import struct
+from bisect import bisect_right
+
+from rbt.RbtObserver import RbtObserver
+from utility.enums import TraceEvent, RbtColor
+
+MAGIC = b'RBT\x01'
+
+# Every record is an opcode byte followed by the little-endian 64-bit integers of its kind
+_BARE = struct.Struct('<B')
+_ONE = struct.Struct('<Bq')  # value
+_TWO = struct.Struct('<Bqq')  # value and parent value or quantity delta
+_VALUE = struct.Struct('<q')
+_PAIR = struct.Struct('<qq')  # value and quantity of a bulk loaded node
+
+VISIT = TraceEvent.VISIT.value
+INSERT_ROOT = TraceEvent.INSERT_ROOT.value
+INSERT_LEFT = TraceEvent.INSERT_LEFT.value
+INSERT_RIGHT = TraceEvent.INSERT_RIGHT.value
+QUANTITY = TraceEvent.QUANTITY.value
+ROTATE = TraceEvent.ROTATE.value
+RECOLOR_RED = TraceEvent.RECOLOR_RED.value
+RECOLOR_BLACK = TraceEvent.RECOLOR_BLACK.value
+DELETE = TraceEvent.DELETE.value
+FIXUP_END = TraceEvent.FIXUP_END.value
+BULK_LOAD = TraceEvent.BULK_LOAD.value
+OPERATION_END = TraceEvent.OPERATION_END.value
+BATCH_BEGIN = TraceEvent.BATCH_BEGIN.value
+BATCH_END = TraceEvent.BATCH_END.value
+CLEAR = TraceEvent.CLEAR.value
+
+
+class TraceRecorder(RbtObserver):
+    # Packs the structural events of a RedBlackTree into a compact binary trace, so the tree can run at full speed
+    # and a TracePlayer shows what it did later, as many times and at whatever speed, without comparing values or
+    # deciding a fixup again. Values have to be integers that fit in 64 bits.
+    # The steps of unlinking a node are not recorded, the player unlinks it in one step that makes the same ones.
+    def __init__(self, stream=None):
+        self.stream = stream  # binary file the trace goes to after every operation, kept in data without one
+        self.data = bytearray(MAGIC)
+        self.unlinking = False
+        self.batch_depth = 0
+        self.operations = 0
+
+    def getvalue(self):
+        return bytes(self.data)
+
+    def flush(self):
+        if self.stream is not None and self.data:
+            self.stream.write(self.data)
+            self.data = bytearray()
+
+    def on_visit(self, node):
+        if not self.unlinking:
+            self.data += _ONE.pack(VISIT, node.value)
+
+    def on_insert(self, node):
+        parent = node.parent
+        if parent.left is parent:  # only nil is its own child
+            self.data += _ONE.pack(INSERT_ROOT, node.value)
+        else:
+            self.data += _TWO.pack(INSERT_LEFT if node is parent.left else INSERT_RIGHT, node.value, parent.value)
+
+    def on_quantity_changed(self, node, old_quantity):
+        self.data += _TWO.pack(QUANTITY, node.value, node.quantity - old_quantity)
+
+    def on_rotate(self, node):
+        self.data += _ONE.pack(ROTATE, node.value)
+
+    def on_recolor(self, node, old_color):
+        if not self.unlinking:
+            self.data += _ONE.pack(RECOLOR_BLACK if node.color == RbtColor.BLACK.value else RECOLOR_RED, node.value)
+
+    def on_fixup_end(self):
+        self.data += _BARE.pack(FIXUP_END)
+
+    def on_delete_begin(self, node):
+        self.data += _ONE.pack(DELETE, node.value)
+        self.unlinking = True
+
+    def on_unlink(self, node):
+        self.unlinking = False
+
+    def on_bulk_load(self, nodes):
+        self.data += _ONE.pack(BULK_LOAD, len(nodes))
+        for node in nodes:
+            self.data += _PAIR.pack(node.value, node.quantity)
+
+    def on_clear(self, nodes):
+        self.data += _BARE.pack(CLEAR)
+
+    def on_operation_end(self):
+        self.data += _BARE.pack(OPERATION_END)
+        if not self.batch_depth:
+            self.operations += 1
+            self.flush()
+
+    def on_batch_begin(self):
+        self.data += _BARE.pack(BATCH_BEGIN)
+        self.batch_depth += 1
+
+    def on_batch_end(self):
+        self.data += _BARE.pack(BATCH_END)
+        self.batch_depth -= 1
+        if not self.batch_depth:
+            self.operations += 1
+            self.flush()
+
+
+class TracePlayer:
+    # Applies a trace to a tree in the state the recorded one started from, usually empty, through the same
+    # structural steps, so the observer of that tree gets the events it would have got from running the operations.
+    # One operation is everything up to an operation end outside of a batch, or a whole batch.
+    # Every snapshot_interval operations the shape of the tree is kept, seek() rebuilds the closest one before
+    # the position it goes to and applies the rest of the way without telling the observer about each step.
+    def __init__(self, data, tree, snapshot_interval=1000):
+        if bytes(data[:len(MAGIC)]) != MAGIC:
+            raise ValueError('not a red-black tree trace')
+        self.data = bytes(data)
+        self.tree = tree
+        self.snapshot_interval = snapshot_interval
+        self.nodes = {node.value: node for node in tree.get_nodes()}
+        self.offset = len(MAGIC)
+        self.position = 0  # operations applied so far
+        self.batch_depth = 0
+        self.created = None  # nodes made while seeking, None while playing
+        self.snapshot_positions = [0]
+        self.snapshots = [(self.offset, self.snapshot())]
+
+        self.handlers = {
+            VISIT: self._visit,
+            INSERT_ROOT: self._insert,
+            INSERT_LEFT: self._insert,
+            INSERT_RIGHT: self._insert,
+            QUANTITY: self._quantity,
+            ROTATE: self._rotate,
+            RECOLOR_RED: self._recolor,
+            RECOLOR_BLACK: self._recolor,
+            DELETE: self._delete,
+            FIXUP_END: self._fixup_end,
+            BULK_LOAD: self._bulk_load,
+            OPERATION_END: self._operation_end,
+            BATCH_BEGIN: self._batch_begin,
+            BATCH_END: self._batch_end,
+            CLEAR: self._clear,
+        }
+
+    @classmethod
+    def from_file(cls, path, tree, *args, **kwargs):
+        with open(path, 'rb') as file:
+            return cls(file.read(), tree, *args, **kwargs)
+
+    def done(self):
+        return self.offset >= len(self.data)
+
+    def step(self):  # applies the next operation, False when the trace is over
+        data, handlers = self.data, self.handlers
+        if self.offset >= len(data):
+            return False
+        position = self.position
+        while self.offset < len(data) and self.position == position:
+            opcode = data[self.offset]
+            self.offset = handlers[opcode](opcode, self.offset + 1)
+
+        if self.position % self.snapshot_interval == 0 and self.position > self.snapshot_positions[-1]:
+            self.snapshot_positions.append(self.position)
+            self.snapshots.append((self.offset, self.snapshot()))
+        return True
+
+    def play(self, operations=None):  # applies that many operations, all of the rest by default
+        while (operations is None or operations > 0) and self.step():
+            if operations is not None:
+                operations -= 1
+
+    def seek(self, position):
+        # The observer only hears of the nodes that were dropped and added on the way, as one bulk load
+        tree = self.tree
+        observer = tree.observer
+        before = set(self.nodes.values()) if observer is not None else ()
+        tree.observer = None
+        self.created = []
+        try:
+            i = bisect_right(self.snapshot_positions, position) - 1
+            if position < self.position or self.snapshot_positions[i] > self.position:
+                self.offset, snapshot = self.snapshots[i]
+                self.position = self.snapshot_positions[i]
+                self.batch_depth = 0
+                self.restore(snapshot)
+            while self.position < position and self.step():
+                pass
+        finally:
+            tree.observer = observer
+            created, self.created = self.created, None
+
+        if observer is not None:
+            dropped = [node for node in before if self.nodes.get(node.value) is not node]
+            dropped.extend(node for node in created if self.nodes.get(node.value) is not node)
+            added = [node for node in self.nodes.values() if node not in before]
+            observer.on_clear(dropped)
+            observer.on_bulk_load(added)
+            observer.on_operation_end()
+
+    def snapshot(self):  # (value, quantity, color, has left child, has right child) of every node in preorder
+        nil = self.tree.nil
+        records = []
+        stack = [self.tree.root] if self.tree.root is not nil else []
+        while stack:
+            node = stack.pop()
+            records.append((node.value, node.quantity, node.color, node.left is not nil, node.right is not nil))
+            if node.right is not nil:
+                stack.append(node.right)
+            if node.left is not nil:
+                stack.append(node.left)
+        return records
+
+    def restore(self, snapshot):  # the tree takes the shape of a snapshot, with new nodes
+        tree = self.tree
+        nil = tree.nil
+        tree.clear()
+        nodes = []
+        slots = [(nil, False)]  # where the next node in preorder hangs, and if it is a left child
+        for value, quantity, color, has_left, has_right in snapshot:
+            parent, left = slots.pop()
+            node = tree._create_node(value, nil)
+            node.quantity = quantity
+            node.color = color
+            node.parent = parent
+            if parent is nil:
+                tree.root = node
+            elif left:
+                parent.left = node
+            else:
+                parent.right = node
+            if has_right:
+                slots.append((node, False))
+            if has_left:
+                slots.append((node, True))
+            nodes.append(node)
+
+        for node in reversed(nodes):  # children come after their parent in preorder
+            node.subtree_size = node.left.subtree_size + node.right.subtree_size + node.quantity
+        self.nodes = {node.value: node for node in nodes}
+        if self.created is not None:
+            self.created.extend(nodes)
+
+    # Handlers, by opcode, each takes the offset after the opcode and returns the one after the record
+
+    def _visit(self, opcode, offset):
+        observer = self.tree.observer
+        if observer is not None:
+            observer.on_visit(self.nodes[_VALUE.unpack_from(self.data, offset)[0]])
+        return offset + 8
+
+    def _insert(self, opcode, offset):
+        tree = self.tree
+        if opcode == INSERT_ROOT:
+            value = _VALUE.unpack_from(self.data, offset)[0]
+            parent = tree.nil
+            offset += 8
+        else:
+            value, parent_value = _PAIR.unpack_from(self.data, offset)
+            parent = self.nodes[parent_value]
+            offset += 16
+
+        ancestor = parent
+        while ancestor is not tree.nil:
+            ancestor.subtree_size += 1
+            ancestor = ancestor.parent
+        node = tree._create_node(value, parent)
+        if self.created is not None:
+            self.created.append(node)
+        tree._attach(node, parent, opcode == INSERT_LEFT)
+        self.nodes[value] = node
+        return offset
+
+    def _quantity(self, opcode, offset):
+        value, delta = _PAIR.unpack_from(self.data, offset)
+        node = self.nodes[value]
+        old_quantity = node.quantity
+        node.quantity += delta
+        self.tree._subtree_size_decrease(node, -delta)
+        if self.tree.observer is not None:
+            self.tree.observer.on_quantity_changed(node, old_quantity)
+        return offset + 16
+
+    def _rotate(self, opcode, offset):
+        node = self.nodes[_VALUE.unpack_from(self.data, offset)[0]]
+        if node.is_right_child():
+            self.tree._left_rotate(node.parent)
+        else:
+            self.tree._right_rotate(node.parent)
+        return offset + 8
+
+    def _recolor(self, opcode, offset):
+        color = RbtColor.BLACK.value if opcode == RECOLOR_BLACK else RbtColor.RED.value
+        self.tree._set_color(self.nodes[_VALUE.unpack_from(self.data, offset)[0]], color)
+        return offset + 8
+
+    def _delete(self, opcode, offset):
+        self.tree._unlink(self.nodes.pop(_VALUE.unpack_from(self.data, offset)[0]))
+        return offset + 8
+
+    def _fixup_end(self, opcode, offset):
+        if self.tree.observer is not None:
+            self.tree.observer.on_fixup_end()
+        return offset
+
+    def _bulk_load(self, opcode, offset):
+        tree = self.tree
+        count = _VALUE.unpack_from(self.data, offset)[0]
+        offset += 8
+        loaded = [_PAIR.unpack_from(self.data, offset + 16 * i) for i in range(count)]
+        values = []
+        for value, quantity in loaded:
+            values.extend([value] * quantity)
+
+        observer, tree.observer = tree.observer, None  # the recorded events of the load follow
+        try:
+            if values:
+                tree.load_sorted(values)
+            else:
+                tree._rebuild(tree.get_nodes())  # only quantities went up, the tree is rebuilt all the same
+        finally:
+            tree.observer = observer
+        new_nodes = [tree.search(value) for value, _ in loaded]
+        self.nodes.update((node.value, node) for node in new_nodes)
+        if self.created is not None:
+            self.created.extend(new_nodes)
+        if observer is not None:
+            observer.on_bulk_load(new_nodes)
+        return offset + 16 * count
+
+    def _clear(self, opcode, offset):
+        tree = self.tree
+        observer, tree.observer = tree.observer, None  # the operation end is recorded after it
+        nodes = tree.get_nodes()
+        edges = [(node, node.parent) for node in nodes]
+        try:
+            tree.clear()
+        finally:
+            tree.observer = observer
+        self.nodes = dict()
+        if observer is not None:
+            observer.on_clear(nodes)  # before the edges, the same order as clear() reports them in
+            tree._report_edges((), edges)
+        return offset
+
+    def _operation_end(self, opcode, offset):
+        if self.tree.observer is not None:
+            self.tree.observer.on_operation_end()
+        if not self.batch_depth:
+            self.position += 1
+        return offset
+
+    def _batch_begin(self, opcode, offset):
+        if self.tree.observer is not None:
+            self.tree.observer.on_batch_begin()
+        self.batch_depth += 1
+        return offset
+
+    def _batch_end(self, opcode, offset):
+        if self.tree.observer is not None:
+            self.tree.observer.on_batch_end()
+        self.batch_depth -= 1
+        if not self.batch_depth:
+            self.position += 1
+        return offset
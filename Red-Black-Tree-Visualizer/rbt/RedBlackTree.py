@@ -0,0 +1,777 @@
+from bisect import bisect_left, bisect_right
+from collections import deque
+from contextlib import contextmanager
+from functools import cmp_to_key
+
+from rbt.RbtBaseNode import RbtBaseNode
+from utility.enums import RbtColor
+
+
+def greater(x, y):
+    return x > y
+
+
+class RedBlackTree:
+    def __init__(self, comparator_func=greater, observer=None, node_class=RbtBaseNode):
+        self.node_class = node_class
+        self.nil = self._create_nil()
+        self.nil.parent = self.nil.left = self.nil.right = self.root = self.nil
+        self.comparator_func = comparator_func
+        self.observer = observer
+
+    @classmethod
+    def from_sorted(cls, values, *args, **kwargs):
+        tree = cls(*args, **kwargs)
+        tree.load_sorted(values)
+        return tree
+
+    def _create_nil(self):
+        return self.node_class(0, None, RbtColor.BLACK.value, 0, 0)
+
+    def _create_node(self, key, parent_node):
+        return self.node_class(key, self.nil, RbtColor.RED.value)
+
+    def __len__(self):
+        return 0 if self.root is self.nil else self.root.subtree_size
+
+    def __contains__(self, value):
+        return self.search(value) is not self.nil
+
+    def __iter__(self):
+        stack = []
+        node = self.root
+        while node is not self.nil:
+            stack.append(node)
+            node = node.left
+        return self._in_order(stack)
+
+    def _in_order(self, stack):
+        # stack holds the nodes still to be visited whose right subtrees were not entered yet, next one on top
+        nil = self.nil
+        while stack:
+            node = stack.pop()
+            yield node
+            node = node.right
+            while node is not nil:
+                stack.append(node)
+                node = node.left
+
+    def irange(self, lo=None, hi=None):  # nodes with lo <= value < hi, None leaves the side unbounded
+        nil = self.nil
+        comparator_func = self.comparator_func
+        stack = []
+        node = self.root
+        while node is not nil:
+            if lo is not None and comparator_func(lo, node.value):
+                node = node.right
+            else:
+                stack.append(node)
+                node = node.left
+
+        for node in self._in_order(stack):
+            if hi is not None and not comparator_func(hi, node.value):
+                return
+            yield node
+
+    def islice_by_rank(self, i, j=None):  # nodes holding ranks from [i, j), right-side exclusive
+        nil = self.nil
+        j = len(self) + 1 if j is None else min(j, len(self) + 1)
+        stack = []
+        node = self.root
+        start = 1  # rank of the first value in the subtree of node
+        while node is not nil and i < j:
+            r = start + node.left.subtree_size
+            if i < r:
+                stack.append(node)
+                node = node.left
+            elif i < r + node.quantity:
+                stack.append(node)
+                start = r
+                break
+            else:
+                start = r + node.quantity
+                node = node.right
+
+        for node in self._in_order(stack):
+            if start >= j:
+                return
+            yield node
+            start += node.quantity
+
+    def __str__(self):
+        nodes = [str(node) for node in self]
+        return f'[{", ".join(nodes)}]'
+
+    def __repr__(self):
+        nodes = [repr(node) for node in self]
+        return f'[{", ".join(nodes)}]'
+
+    def __getitem__(self, index):
+        return self.find_by_rank(self.root, index + 1).value
+
+    def minimum(self, node):
+        if node is self.nil:
+            return self.nil
+        while node.left is not self.nil:
+            node = node.left
+        return node
+
+    def maximum(self, node):
+        if node is self.nil:
+            return self.nil
+        while node.right is not self.nil:
+            node = node.right
+        return node
+
+    def successor(self, node):
+        if node is self.nil:
+            return self.nil
+        if node.right is not self.nil:
+            return self.minimum(node.right)
+        parent_node = node.parent
+        while parent_node is not self.nil and node == parent_node.right:
+            node = parent_node
+            parent_node = parent_node.parent
+        return parent_node
+
+    def predecessor(self, node):
+        if node is self.nil:
+            return self.nil
+        if node.left is not self.nil:
+            return self.maximum(node.left)
+        parent_node = node.parent
+        while parent_node is not self.nil and node == parent_node.left:
+            node = parent_node
+            parent_node = parent_node.parent
+        return parent_node
+
+    def _set_color(self, node, color):
+        if node.color == color:
+            return
+        old_color = node.color
+        node.set_color(color)
+        if self.observer is not None:
+            self.observer.on_recolor(node, old_color)
+
+    def _edge(self, node1, node2):
+        return (node2, node1) if self.comparator_func(node1.value, node2.value) else (node1, node2)
+
+    def _report_edges(self, added, removed):
+        nil = self.nil
+        added = {self._edge(*edge) for edge in added if edge[0] is not nil and edge[1] is not nil}
+        removed = {self._edge(*edge) for edge in removed if edge[0] is not nil and edge[1] is not nil}
+        common = added & removed
+        self.observer.on_edges_changed(added - common, removed - common)
+
+    def _left_rotate(self, node):
+        rot_node = node.right
+        node.right = rot_node.left
+        if rot_node.left is not self.nil:
+            rot_node.left.parent = node
+        rot_node.parent = node.parent
+        if node.parent is self.nil:
+            self.root = rot_node
+        elif node is node.parent.left:
+            node.parent.left = rot_node
+        else:
+            node.parent.right = rot_node
+        rot_node.left = node
+        node.parent = rot_node
+        rot_node.subtree_size = node.subtree_size
+        node.subtree_size = node.left.subtree_size + node.right.subtree_size + node.quantity
+        if self.observer is not None:
+            self._report_edges(
+                ((rot_node.parent, rot_node), (node.right, node)), ((rot_node.parent, node), (node.right, rot_node))
+            )
+            self.observer.on_rotate(rot_node)
+
+    def _right_rotate(self, rot_node):
+        node = rot_node.left
+        rot_node.left = node.right
+        if node.right is not self.nil:
+            node.right.parent = rot_node
+        node.parent = rot_node.parent
+        if rot_node.parent is self.nil:
+            self.root = node
+        elif rot_node is rot_node.parent.right:
+            rot_node.parent.right = node
+        else:
+            rot_node.parent.left = node
+        node.right = rot_node
+        rot_node.parent = node
+        node.subtree_size = rot_node.subtree_size
+        rot_node.subtree_size = rot_node.left.subtree_size + rot_node.right.subtree_size + rot_node.quantity
+        if self.observer is not None:
+            self._report_edges(
+                ((node.parent, node), (rot_node.left, rot_node)), ((node.parent, rot_node), (rot_node.left, node))
+            )
+            self.observer.on_rotate(node)
+
+    def get_nodes_bfs(self):
+        nodes = []
+        if len(self):
+            queue = deque([self.root])
+            while queue:
+                node = queue.popleft()
+                nodes.append(node)
+                if node.left is not self.nil:
+                    queue.append(node.left)
+                if node.right is not self.nil:
+                    queue.append(node.right)
+        return nodes
+
+    def get_edges_set(self):
+        edges = set()
+        for node in self:
+            if node.parent is not self.nil:
+                edges.add((node, node.parent) if node.value < node.parent.value else (node.parent, node))
+        return edges
+
+    def get_values(self):
+        return [node.value for node in self]
+
+    def get_quantities(self):
+        return [node.quantity for node in self]
+
+    def get_values_with_quantity(self):
+        return [node.quantity for node in self for _ in range(node.quantity)]
+
+    def get_nodes(self):
+        return [node for node in self]
+
+    def depth(self, node):
+        depth = 0
+        while node is not self.nil:
+            node = node.parent
+            depth += 1
+        return depth
+
+    def begin(self):
+        return self.minimum(self.root)
+
+    def end(self):
+        return self.maximum(self.root)
+
+    def clear(self):
+        nil = self.nil
+        nodes = self.get_nodes()
+        edges = [(node, node.parent) for node in nodes] if self.observer is not None else ()
+        for node in nodes:
+            node.parent = nil
+            node.right = nil
+            node.left = nil
+
+        self.root = nil
+        if self.observer is not None:
+            self.observer.on_clear(nodes)  # before the edges, what is still animated is finished first
+            self._report_edges((), edges)
+            self.observer.on_operation_end()
+
+    def count(self, val):
+        node = self.search(val)
+        return node.quantity if node is not self.nil else 0
+
+    def search(self, key):
+        nil = self.nil
+        node = self.root
+        if self.comparator_func is greater:
+            while node is not nil:
+                value = node.value
+                if value > key:
+                    node = node.left
+                elif key > value:
+                    node = node.right
+                else:
+                    return node
+            return node
+
+        comparator_func = self.comparator_func
+        while node is not nil:
+            if comparator_func(node.value, key):
+                node = node.left
+            elif comparator_func(key, node.value):
+                node = node.right
+            else:
+                return node
+        return node
+
+    def insert(self, key):
+        observer = self.observer
+        node = self.root
+        parent_node = self.nil
+        while node is not self.nil:
+            if observer is not None:
+                observer.on_visit(node)
+            node.subtree_size += 1
+            parent_node = node
+            if not self.comparator_func(node.value, key) and not self.comparator_func(key, node.value):
+                node.quantity += 1
+                if observer is not None:
+                    observer.on_quantity_changed(node, node.quantity - 1)
+                    observer.on_operation_end()
+                return node
+            elif self.comparator_func(node.value, key):
+                node = node.left
+            else:
+                node = node.right
+
+        new_node = self._create_node(key, parent_node)
+        left = parent_node is not self.nil and self.comparator_func(parent_node.value, key)
+        self._attach(new_node, parent_node, left)
+        self._insert_fixup(new_node)
+
+        if observer is not None:
+            observer.on_operation_end()
+        return new_node
+
+    def _attach(self, new_node, parent_node, left):  # hangs a new leaf, subtree sizes above it are already counted
+        new_node.parent = parent_node
+        if parent_node is self.nil:
+            self.root = new_node
+        elif left:
+            parent_node.left = new_node
+        else:
+            parent_node.right = new_node
+
+        if self.observer is not None:
+            self._report_edges(((new_node, parent_node),), ())
+            self.observer.on_insert(new_node)
+
+    def _insert_fixup(self, z):
+        while not z.parent.color:
+            if z.parent is z.parent.parent.left:
+                y = z.parent.parent.right
+                if not y.color:
+                    self._set_color(z.parent, RbtColor.BLACK.value)
+                    self._set_color(y, RbtColor.BLACK.value)
+                    self._set_color(z.parent.parent, RbtColor.RED.value)
+                    z = z.parent.parent
+                else:
+                    if z is z.parent.right:
+                        z = z.parent
+                        self._left_rotate(z)
+                    self._set_color(z.parent, RbtColor.BLACK.value)
+                    self._set_color(z.parent.parent, RbtColor.RED.value)
+                    self._right_rotate(z.parent.parent)
+            elif z.parent is z.parent.parent.right:
+                y = z.parent.parent.left
+                if not y.color:
+                    self._set_color(z.parent, RbtColor.BLACK.value)
+                    self._set_color(y, RbtColor.BLACK.value)
+                    self._set_color(z.parent.parent, RbtColor.RED.value)
+                    z = z.parent.parent
+                else:
+                    if z is z.parent.left:
+                        z = z.parent
+                        self._right_rotate(z)
+                    self._set_color(z.parent, RbtColor.BLACK.value)
+                    self._set_color(z.parent.parent, RbtColor.RED.value)
+                    self._left_rotate(z.parent.parent)
+
+        self._set_color(self.root, RbtColor.BLACK.value)
+        if self.observer is not None:
+            self.observer.on_fixup_end()
+
+    @contextmanager
+    def batch(self):
+        if self.observer is not None:
+            self.observer.on_batch_begin()
+        try:
+            yield self
+        finally:
+            if self.observer is not None:
+                self.observer.on_batch_end()
+
+    def insert_iterable(self, key_list):
+        for x in key_list:
+            self.insert(x)
+
+    def bulk_load(self, iterable):
+        if self.comparator_func is greater:
+            values = sorted(iterable)
+        else:
+            comparator_func = self.comparator_func
+            values = sorted(iterable, key=cmp_to_key(
+                lambda x, y: 1 if comparator_func(x, y) else -1 if comparator_func(y, x) else 0
+            ))
+        self.load_sorted(values)
+
+    def load_sorted(self, values):  # values have to be sorted, equal ones are folded into quantity
+        comparator_func = self.comparator_func
+        runs = []
+        for value in values:
+            if runs and not comparator_func(value, runs[-1][0]):
+                runs[-1][1] += 1
+            else:
+                runs.append([value, 1])
+        if not runs:
+            return
+
+        existing = self.get_nodes()
+        nodes = []
+        new_nodes = []
+        i = 0
+        for value, quantity in runs:
+            while i < len(existing) and comparator_func(value, existing[i].value):
+                nodes.append(existing[i])
+                i += 1
+            if i < len(existing) and not comparator_func(existing[i].value, value):
+                existing[i].quantity += quantity
+                if self.observer is not None:
+                    self.observer.on_quantity_changed(existing[i], existing[i].quantity - quantity)
+            else:
+                node = self._create_node(value, self.nil)
+                node.quantity = quantity
+                nodes.append(node)
+                new_nodes.append(node)
+        nodes.extend(existing[i:])
+        self._rebuild(nodes)
+
+        if self.observer is not None:
+            self.observer.on_bulk_load(new_nodes)
+            self.observer.on_operation_end()
+
+    def _rebuild(self, nodes):  # the nodes, in order, become one balanced tree
+        # Mid-split keeps every level but the deepest one full, so making only the deepest level red
+        # gives each root-to-leaf path the same number of black nodes
+        self.root = self._build_balanced(nodes, 0, len(nodes), self.nil, 0, len(nodes).bit_length() - 1)
+
+    def _build_balanced(self, nodes, lo, hi, parent, depth, red_depth):
+        if lo >= hi:
+            return self.nil
+        mid = (lo + hi) // 2
+        node = nodes[mid]
+        node.parent = parent
+        node.color = RbtColor.RED.value if depth == red_depth and depth > 0 else RbtColor.BLACK.value
+        node.left = self._build_balanced(nodes, lo, mid, node, depth + 1, red_depth)
+        node.right = self._build_balanced(nodes, mid + 1, hi, node, depth + 1, red_depth)
+        node.subtree_size = node.left.subtree_size + node.right.subtree_size + node.quantity
+        return node
+
+    def _transplant(self, x, y):
+        if x.parent is self.nil:
+            self.root = y
+        elif x is x.parent.left:
+            x.parent.left = y
+        else:
+            x.parent.right = y
+        y.parent = x.parent
+        y.subtree_size = (0 if y.left is self.nil else y.left.subtree_size) + (
+            0 if y.right is self.nil else y.right.subtree_size) + y.quantity
+
+        if self.observer is not None:
+            self.observer.on_transplant(x, y)
+
+    def delete(self, node):
+        if node.quantity > 1:
+            node.quantity -= 1
+            self._subtree_size_decrease(node)
+            if self.observer is not None:
+                self.observer.on_quantity_changed(node, node.quantity + 1)
+                self.observer.on_operation_end()
+            return
+        self.delete_all(node)
+
+    def delete_all(self, node):
+        z, y_og_color = self._unlink(node)
+        if y_og_color:
+            self._delete_fixup(z)
+
+        if self.observer is not None:
+            self.observer.on_operation_end()
+
+    def _unlink(self, node):  # takes the node out of the tree, returns where the fixup starts and whether it is needed
+        observer = self.observer
+        if observer is not None:
+            observer.on_delete_begin(node)
+
+        self._subtree_size_decrease(node.parent, node.quantity)
+        y = node
+        y_og_color = y.color
+        if node.left is self.nil:
+            z = node.right
+            self._transplant(node, node.right)
+            edges_added, edges_removed = ((z, node.parent),), ((node, node.parent), (z, node))
+        elif node.right is self.nil:
+            z = node.left
+            self._transplant(node, node.left)
+            edges_added, edges_removed = ((z, node.parent),), ((node, node.parent), (z, node))
+        else:
+            y = self.minimum(node.right)
+            y_og_color = y.color
+            y_parent = y.parent
+            z = y.right
+
+            if y_parent is node:
+                z.parent = y
+                edges_added = ((y, node.parent), (node.left, y))
+                edges_removed = ((node, node.parent), (node.left, node), (y, node))
+            else:
+                self._subtree_size_decrease(y.parent, y.quantity, stop=node)
+                self._transplant(y, y.right)
+                y.right = node.right
+                y.right.parent = y
+                edges_added = ((y, node.parent), (node.left, y), (node.right, y), (z, y_parent))
+                edges_removed = ((node, node.parent), (node.left, node), (node.right, node), (y, y_parent), (z, y))
+            self._transplant(node, y)
+            y.left = node.left
+            y.left.parent = y
+            self._set_color(y, node.color)
+            y.subtree_size = (0 if y.left is self.nil else y.left.subtree_size) + (
+                0 if y.right is self.nil else y.right.subtree_size) + y.quantity
+
+        if observer is not None:
+            self._report_edges(edges_added, edges_removed)
+            observer.on_unlink(node)
+        return z, y_og_color
+
+    def _delete_fixup(self, node):
+        while node is not self.root and node.color:
+            if node is node.parent.left:
+                sibling = node.parent.right
+                if not sibling.color:
+                    self._set_color(sibling, RbtColor.BLACK.value)
+                    self._set_color(sibling.parent, RbtColor.RED.value)
+                    self._left_rotate(node.parent)
+                    sibling = node.parent.right
+                if sibling is self.nil or (sibling.left.color and sibling.right.color):
+                    if sibling is not self.nil:
+                        self._set_color(sibling, RbtColor.RED.value)
+                    node = node.parent
+                else:
+                    if not sibling.left.color:
+                        self._set_color(sibling.left, RbtColor.BLACK.value)
+                        self._set_color(sibling, RbtColor.RED.value)
+                        self._right_rotate(sibling)
+                        sibling = node.parent.right
+                    self._set_color(sibling, node.parent.color)
+                    self._set_color(node.parent, RbtColor.BLACK.value)
+                    self._set_color(sibling.right, RbtColor.BLACK.value)
+
+                    self._left_rotate(node.parent)
+                    node = self.root
+            else:
+                sibling = node.parent.left
+                if not sibling.color:
+                    self._set_color(sibling, RbtColor.BLACK.value)
+                    self._set_color(sibling.parent, RbtColor.RED.value)
+                    self._right_rotate(node.parent)
+                    sibling = node.parent.left
+                if sibling is self.nil or (sibling.right.color and sibling.left.color):
+                    if sibling is not self.nil:
+                        self._set_color(sibling, RbtColor.RED.value)
+                    node = node.parent
+                else:
+                    if not sibling.right.color:
+                        self._set_color(sibling.right, RbtColor.BLACK.value)
+                        self._set_color(sibling, RbtColor.RED.value)
+                        self._left_rotate(sibling)
+                        sibling = node.parent.left
+                    self._set_color(sibling, node.parent.color)
+                    self._set_color(node.parent, RbtColor.BLACK.value)
+                    self._set_color(sibling.left, RbtColor.BLACK.value)
+
+                    self._right_rotate(node.parent)
+                    node = self.root
+        self._set_color(node, RbtColor.BLACK.value)
+        if self.observer is not None:
+            self.observer.on_fixup_end()
+
+    def _subtree_size_decrease(self, node, val=1, stop=None):
+        if stop is None:
+            stop = self.nil
+        while node is not stop:
+            node.subtree_size -= val
+            node = node.parent
+
+    def delete_by_value(self, value):
+        node = self.search(value)
+        if node is self.nil:
+            raise ValueError('Value not in the structure')
+        else:
+            self.delete(node)
+
+    def delete_all_by_value(self, value):
+        node = self.search(value)
+        if node is self.nil:
+            raise ValueError('Value not in the structure')
+        else:
+            self.delete_all(node)
+
+    def lower_bound(self, key):
+        # every node reached by going left is smaller than the previous candidate, so the last one wins
+        nil = self.nil
+        node = self.root
+        candidate = nil
+        if self.comparator_func is greater:
+            while node is not nil:
+                if key > node.value:
+                    node = node.right
+                else:
+                    candidate = node
+                    node = node.left
+            return candidate
+
+        comparator_func = self.comparator_func
+        while node is not nil:
+            if comparator_func(key, node.value):
+                node = node.right
+            else:
+                candidate = node
+                node = node.left
+        return candidate
+
+    def upper_bound(self, key):
+        nil = self.nil
+        node = self.root
+        candidate = nil
+        if self.comparator_func is greater:
+            while node is not nil:
+                if node.value > key:
+                    candidate = node
+                    node = node.left
+                else:
+                    node = node.right
+            return candidate
+
+        comparator_func = self.comparator_func
+        while node is not nil:
+            if comparator_func(node.value, key):
+                candidate = node
+                node = node.left
+            else:
+                node = node.right
+        return candidate
+
+    def find_by_rank(self, node, i):
+        if not (1 <= i <= node.subtree_size):
+            raise IndexError("Invalid index")
+        while True:
+            r = node.left.subtree_size + 1
+            if i < r:
+                node = node.left
+            elif i < r + node.quantity:
+                return node
+            else:
+                i -= r + node.quantity - 1
+                node = node.right
+
+    def select(self, i):
+        return self.find_by_rank(self.root, i)
+
+    def select_many(self, indices):
+        # One descent for all ranks: sorted ranks are split between the subtrees at every node
+        order = sorted(range(len(indices)), key=indices.__getitem__)
+        if order and not (1 <= indices[order[0]] and indices[order[-1]] <= len(self)):
+            raise IndexError("Invalid index")
+
+        result = [None] * len(indices)
+        stack = [(self.root, 0, len(order), 0)] if order else []
+        while stack:
+            node, lo, hi, offset = stack.pop()
+            if hi - lo == 1:
+                result[order[lo]] = self.find_by_rank(node, indices[order[lo]] - offset)
+                continue
+            r = offset + node.left.subtree_size + 1
+            mid_lo = bisect_left(order, r, lo, hi, key=indices.__getitem__)
+            mid_hi = bisect_left(order, r + node.quantity, mid_lo, hi, key=indices.__getitem__)
+            for j in range(mid_lo, mid_hi):
+                result[order[j]] = node
+            if lo < mid_lo:
+                stack.append((node.left, lo, mid_lo, offset))
+            if mid_hi < hi:
+                stack.append((node.right, mid_hi, hi, r + node.quantity - 1))
+        return result
+
+    def rank(self, value):  # rank the value has or would have if inserted, counting smaller values only
+        return self._rank_from(self.root, value, 1)
+
+    def _rank_from(self, node, value, r):
+        nil = self.nil
+        if self.comparator_func is greater:
+            while node is not nil:
+                node_value = node.value
+                if node_value > value:
+                    node = node.left
+                elif value > node_value:
+                    r += node.left.subtree_size + node.quantity
+                    node = node.right
+                else:
+                    return r + node.left.subtree_size
+            return r
+
+        comparator_func = self.comparator_func
+        while node is not nil:
+            if comparator_func(node.value, value):
+                node = node.left
+            elif comparator_func(value, node.value):
+                r += node.left.subtree_size + node.quantity
+                node = node.right
+            else:
+                return r + node.left.subtree_size
+        return r
+
+    def ranks(self, values):
+        # Same as [self.rank(value) for value in values], with one shared descent for all values.
+        # Sorting through cmp_to_key costs more than it saves, so custom comparators go one by one
+        if self.comparator_func is not greater:
+            return [self.rank(value) for value in values]
+
+        key = values.__getitem__
+        order = sorted(range(len(values)), key=key)
+
+        nil = self.nil
+        result = [0] * len(values)
+        stack = [(self.root, 0, len(order), 1)] if order else []
+        while stack:
+            node, lo, hi, r = stack.pop()
+            if hi - lo == 1:
+                result[order[lo]] = self._rank_from(node, values[order[lo]], r)
+                continue
+            if node is nil:
+                for j in range(lo, hi):
+                    result[order[j]] = r
+                continue
+            mid_lo = bisect_left(order, node.value, lo, hi, key=key)
+            mid_hi = bisect_right(order, node.value, mid_lo, hi, key=key)
+            for j in range(mid_lo, mid_hi):
+                result[order[j]] = r + node.left.subtree_size
+            if lo < mid_lo:
+                stack.append((node.left, lo, mid_lo, r))
+            if mid_hi < hi:
+                stack.append((node.right, mid_hi, hi, r + node.left.subtree_size + node.quantity))
+        return result
+
+    def get_rank(self, node):
+        if node is self.nil:
+            raise ValueError("Node not found in the container")
+        r = node.left.subtree_size + 1
+        while node is not self.root:
+            if node is node.parent.right:
+                r += node.parent.left.subtree_size + node.parent.quantity
+            node = node.parent
+        return r
+
+    def get_rank_range(self, node):  # right-side exclusive
+        r = self.get_rank(node)
+        return r, r + node.quantity
+
+    def get_rank_by_value(self, val):
+        node = self.search(val)
+        if node is self.nil:
+            raise ValueError("Node not found in the container")
+        return self.get_rank(node)
+
+    def get_rank_range_by_value(self, val):  # right-side exclusive
+        node = self.search(val)
+        if node is self.nil:
+            raise ValueError("Node not found in the container")
+        return self.get_rank_range(node)
+
+    def _set_value(self, key, value, new_quantity=1):  # potentially dangerous
+        if key in self:
+            node = self.search(key)
+            node.value = value
+            prev_quantity = node.quantity
+            node.quantity = new_quantity
+            self._subtree_size_decrease(node, prev_quantity - node.quantity)
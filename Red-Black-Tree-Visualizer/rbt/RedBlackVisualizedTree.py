@@ -1,446 +1,196 @@
-from collections import deque
-
-from pygame import Vector2
-
+from controllers.TreeLayout import TreeLayout
 from rbt.RbtNode import RbtNode
+from rbt.RbtObserver import RbtObserver
+from rbt.RedBlackTree import RedBlackTree, greater
 from utility.enums import Operation, RbtColor, Color
 
 
-class RedBlackVisualizedTree:
-    def __init__(self, visualizer, comparator_func=lambda x, y: x > y):
-        self.base_position = (visualizer.screen.get_width() // 2, 100)
-        self.nil = RbtNode(
-            0, None, RbtColor.BLACK.value, 0, 0,
-            position=self.base_position,
-            dest_position=(visualizer.screen.get_width() // 2, 100), radius=50,
-            visualizer=visualizer
-        )  # Base position and radius
-        self.nil.parent = self.nil.left = self.nil.right = self.root = self.nil
-        self.comparator_func = comparator_func
-
+class RedBlackVisualizedTree(RedBlackTree, RbtObserver):
+    def __init__(self, visualizer, comparator_func=greater):
         self.visualizer = visualizer
+        self.base_position = (visualizer.screen.get_width() // 2, 100)
         self.nodes_being_deleted = set()
 
-    def __len__(self):
-        return 0 if self.root is self.nil else self.root.subtree_size
+        # Net changes collected while inside batch(), animated together when the outermost batch ends
+        self.batch_depth = 0
+        self.batch_inserted = dict()
+        self.batch_deleted = dict()
+        self.batch_colors = dict()
+        self.batch_full_layout = False
 
-    def __contains__(self, value):
-        return self.search(value) is not self.nil
+        super().__init__(comparator_func, observer=self, node_class=RbtNode)
+        self.layout = TreeLayout(self.base_position, self.nil.radius, incremental=True)
 
-    def __iter__(self):
-        self.current = self.minimum(self.root)
-        return self
+    def _create_nil(self):
+        return RbtNode(
+            0, None, RbtColor.BLACK.value, 0, 0,
+            position=self.base_position,
+            dest_position=(self.visualizer.screen.get_width() // 2, 100), radius=50,
+            visualizer=self.visualizer
+        )  # Base position and radius
 
-    def __next__(self):
-        if self.current is self.nil:
-            raise StopIteration
-        else:
-            next_node = self.current
-            self.current = self.successor(self.current)
-            return next_node
-
-    def __str__(self):
-        nodes = [str(node) for node in self]
-        return f'[{", ".join(nodes)}]'
-
-    def __repr__(self):
-        nodes = [repr(node) for node in self]
-        return f'[{", ".join(nodes)}]'
-
-    def __getitem__(self, index):
-        return self.find_by_rank(self.root, index + 1).value
-
-    def minimum(self, node):
-        if node is self.nil:
-            return self.nil
-        while node.left is not self.nil:
-            node = node.left
-        return node
+    def _create_node(self, key, parent_node):
+        pos = parent_node.position
+        if len(self) == 0:
+            pos = (self.base_position[0], -100)
 
-    def maximum(self, node):
-        if node is self.nil:
-            return self.nil
-        while node.right is not self.nil:
-            node = node.right
+        node = RbtNode(
+            key, self.nil, RbtColor.RED.value, visualizer=self.visualizer,
+            position=pos, dest_position=parent_node.dest_position, radius=parent_node.radius
+        )  # change position and radius
+        self.visualizer.node_moved(node)
         return node
 
-    def successor(self, node):
-        if node is self.nil:
-            return self.nil
-        if node.right is not self.nil:
-            return self.minimum(node.right)
-        parent_node = node.parent
-        while parent_node is not self.nil and node == parent_node.right:
-            node = parent_node
-            parent_node = parent_node.parent
-        return parent_node
-
-    def predecessor(self, node):
-        if node is self.nil:
-            return self.nil
-        if node.left is not self.nil:
-            return self.maximum(node.left)
-        parent_node = node.parent
-        while parent_node is not self.nil and node == parent_node.left:
-            node = parent_node
-            parent_node = parent_node.parent
-        return parent_node
-
-    def _left_rotate(self, node):
-        rot_node = node.right
-        node.right = rot_node.left
-        if rot_node.left is not self.nil:
-            rot_node.left.parent = node
-        rot_node.parent = node.parent
-        if node.parent is self.nil:
-            self.root = rot_node
-        elif node is node.parent.left:
-            node.parent.left = rot_node
-        else:
-            node.parent.right = rot_node
-        rot_node.left = node
-        node.parent = rot_node
-        rot_node.subtree_size = node.subtree_size
-        node.subtree_size = node.left.subtree_size + node.right.subtree_size + node.quantity
-        self.bfs_reposition(rot_node)
-        self.visualizer.animation_controller.add_animated_element((Operation.CHANGE_COLOR, None, 20))
-
-    def _right_rotate(self, rot_node):
-        node = rot_node.left
-        rot_node.left = node.right
-        if node.right is not self.nil:
-            node.right.parent = rot_node
-        node.parent = rot_node.parent
-        if rot_node.parent is self.nil:
-            self.root = node
-        elif rot_node is rot_node.parent.right:
-            rot_node.parent.right = node
-        else:
-            rot_node.parent.left = node
-        node.right = rot_node
-        rot_node.parent = node
-        node.subtree_size = rot_node.subtree_size
-        rot_node.subtree_size = rot_node.left.subtree_size + rot_node.right.subtree_size + rot_node.quantity
-        self.bfs_reposition(node)
-        self.visualizer.animation_controller.add_animated_element((Operation.CHANGE_COLOR, None, 20))
-
-    def get_nodes_bfs(self):
-        nodes = []
-        if len(self):
-            queue = deque([self.root])
-            while queue:
-                node = queue.popleft()
-                nodes.append(node)
-                if node.left is not self.nil:
-                    queue.append(node.left)
-                if node.right is not self.nil:
-                    queue.append(node.right)
-        return nodes
-
-    def get_edges_set(self):
-        edges = set()
-        for node in self:
-            if node.parent is not self.nil:
-                edges.add((node, node.parent) if node.value < node.parent.value else (node.parent, node))
-        return edges
-
-    def get_values(self):
-        return [node.value for node in self]
-
-    def get_quantities(self):
-        return [node.quantity for node in self]
-
-    def get_values_with_quantity(self):
-        return [node.quantity for node in self for _ in range(node.quantity)]
-
-    def get_nodes(self):
-        return [node for node in self]
-
-    def reset_child_offset(self):
-        for node in self.get_nodes():
-            node.child_side_offset_mult = self.nil.child_side_offset_mult
-
-    def collision_check(self):
-        self.reset_child_offset()
-        self.mock_bfs_reposition(self.root)
-        for node1 in reversed(self.get_nodes()):
-            for node2 in self.get_nodes():
-                if (node1 is not node2 and (
-                        Vector2(node1.dest_position).distance_to(Vector2(node2.dest_position)) <= 3 * node1.radius or
-                        node1.value < node2.value and node1.position[0] > node2.position[0]
-                )):
-                    self.double_radius_offset(node1, node2)
-                    self.bfs_reposition()
-                    print("COLLISION!")
-
-        moves = []
-        for node in self.get_nodes():
-            if node.position != node.dest_position:
-                moves.append((Operation.MOVE, (node, node.dest_position), 50))
-
-        moves.extend(
-            self.visualizer.edge_manager.edge_diffs_with_animations(self.get_edges_set(), 50)
-        )
-        self.visualizer.animation_controller.add_animated_element((Operation.BUNDLE, moves))
-
-
-    def mock_bfs_reposition(self, node=None):
-        self.nil.position = self.base_position
-        self.nil.dest_position = self.base_position
-
-        if len(self):
-            if node is None:
-                node = self.root
-
-            queue = deque([node])
-            while queue:
-                node = queue.popleft()
-                node.dest_position = (
-                    node.parent.dest_position[0] + node.radius * node.parent.child_side_offset_mult * (
-                        -1 if node.parent.left is node else 1) * (0 if node.parent is self.nil else 1),
-                    node.parent.dest_position[1] + node.radius * 3 * (0 if node.parent is self.nil else 1)
-                )
-                if node.left is not self.nil:
-                    queue.append(node.left)
-                if node.right is not self.nil:
-                    queue.append(node.right)
-
-
-    def bfs_reposition(self, node=None):
-        self.nil.position = self.base_position
-        self.nil.dest_position = self.base_position
-
-        moves = []
-        if len(self):
-            if node is None:
-                node = self.root
-
-            queue = deque([node])
-            while queue:
-                node = queue.popleft()
-                node.dest_position = (
-                    node.parent.dest_position[0] + node.radius * node.parent.child_side_offset_mult * (
-                        -1 if node.parent.left is node else 1) * (0 if node.parent is self.nil else 1),
-                    node.parent.dest_position[1] + node.radius * 3 * (0 if node.parent is self.nil else 1)
-                )
-                moves.append((Operation.MOVE, (node, node.dest_position), 50))
-                if node.left is not self.nil:
-                    queue.append(node.left)
-                if node.right is not self.nil:
-                    queue.append(node.right)
-
-
+    def edge_animations(self, add_frames=0, remove_frames=50):
+        edge_manager = self.visualizer.edge_manager
+        anims = edge_manager.delta_with_animations(add_frames, remove_frames)
+        if edge_manager.debug:
+            edge_manager.check_consistency(self.get_edges_set())
+        return anims
+
+    def update_layout(self, full=False):
+        moved = self.layout.apply(self) if full else self.layout.update(self)
+        for node in moved:
+            self.visualizer.node_changed(node)  # the drawing order follows dest_position
+        return moved
+
+    def reposition(self, full=False):
+        moved = self.update_layout(full)
+        moves = [(Operation.MOVE, (node, node.dest_position), 50) for node in moved]
         moves.extend(
-            self.visualizer.edge_manager.edge_diffs_with_animations(self.get_edges_set(), 50)
+            self.edge_animations(50)
         )
-        self.visualizer.animation_controller.add_animated_element((Operation.BUNDLE, moves))
-
-    def double_radius_offset(self, node1, node2):
-        while node1 is not self.nil and node2 is not self.nil and node1 is not node2:
-            node1 = node1.parent
-            node2 = node2.parent
-
-        if node1 is node2 and node1 is not self.nil:
-            node1.child_side_offset_mult *= 2
-
-    def depth(self, node):
-        depth = 0
-        while node is not self.nil:
-            node = node.parent
-            depth += 1
-        return depth
-
-    def begin(self):
-        return self.minimum(self.root)
-
-    def end(self):
-        return self.maximum(self.root)
-
-    def clear(self):
-        old = self.nil
-        for node in self:
-            if old is not self.nil:
-                old.parent = self.nil
-                old.right = self.nil
-                old.left = self.nil
-            old = node
-
-        self.root = self.nil
-
-    def count(self, val):
-        node = self.search(val)
-        return node.quantity if node is not self.nil else 0
-
-    def search(self, key):
-        node = self.root
-        while node is not self.nil and (self.comparator_func(node.value, key) or self.comparator_func(key, node.value)):
-            if self.comparator_func(node.value, key):
-                node = node.left
+        if moves:
+            self.visualizer.animation_controller.add_animated_element((Operation.BUNDLE, moves))
+
+    def get_subtrees(self, view_box, min_width):
+        # The part of the tree inside view_box split top-down into (node, None) for nodes drawn on their own and
+        # (node, box) for whole subtrees narrower than min_width, box being the area their nodes are expected to
+        # cover. Only nodes above the split are visited, so the count depends on the view and not on the tree size.
+        nil = self.nil
+        level_height = self.layout.y_step
+        x0, y0, x1, y1 = view_box
+        subtrees = []
+        stack = [] if self.root is nil else [self.root]
+        while stack:
+            node = stack.pop()
+            x, y = node.position
+            if y > y1:
+                continue
+            if node.left is nil and node.right is nil:
+                if x0 <= x <= x1 and y0 <= y:
+                    subtrees.append((node, None))
+                continue
+
+            leftmost = rightmost = node
+            while leftmost.left is not nil:
+                leftmost = leftmost.left
+            while rightmost.right is not nil:
+                rightmost = rightmost.right
+            left_x, right_x = min(x, leftmost.position[0]), max(x, rightmost.position[0])
+            # subtree_size counts duplicates, the number of nodes is bounded by the width as the layout keeps them
+            # at least x_step apart. levels is the height of a perfectly balanced subtree, the real one at most twice
+            nodes = int(rightmost.dest_position[0] - leftmost.dest_position[0]) // self.layout.x_step + 1
+            levels = min(node.subtree_size, nodes).bit_length()
+            if right_x < x0 or left_x > x1 or y + 2 * levels * level_height < y0:
+                continue
+
+            if right_x - left_x < min_width:
+                subtrees.append((node, (left_x, y, right_x, y + levels * level_height)))
             else:
-                node = node.right
-
-        return node
+                subtrees.append((node, None))
+                for child in (node.right, node.left):
+                    if child is not nil:
+                        stack.append(child)
+        return subtrees
 
-    def insert(self, key):
-        node = self.root
-        parent_node = self.nil
-        while node is not self.nil:
+    # Observer hooks, called by RedBlackTree while it mutates the structure
 
+    def on_visit(self, node):
+        if not self.batch_depth:
             self.visualizer.animation_controller.add_animated_element((Operation.HIGHLIGHT, node, 30))
-            node.subtree_size += 1
-            parent_node = node
-            if not self.comparator_func(node.value, key) and not self.comparator_func(key, node.value):
-                node.quantity += 1
-                return
-            elif self.comparator_func(node.value, key):
-                node = node.left
-            else:
-                node = node.right
 
-        pos = parent_node.position
-        if len(self) == 0:
-            pos = (self.base_position[0], -100)
+    def on_edges_changed(self, added, removed):
+        self.visualizer.edge_manager.apply_delta(added, removed)
+        for node1, node2 in added:
+            # a node that got a new parent may keep its depth while the nodes it now hangs under move
+            self.layout.mark_dirty(node1 if node1.parent is node2 else node2)
 
-        new_node = RbtNode(
-            key, self.nil, RbtColor.RED.value, visualizer=self.visualizer,
-            position=pos, dest_position=parent_node.dest_position, radius=parent_node.radius
-        )  # change position and radius
-
-        new_node.parent = parent_node
-        if parent_node is self.nil:
-            self.root = new_node
-        elif self.comparator_func(parent_node.value, new_node.value):
-            parent_node.left = new_node
-        else:
-            parent_node.right = new_node
-
-        if len(self) > 1:
-            new_node.dest_position = (
-                parent_node.dest_position[0] + new_node.radius * parent_node.child_side_offset_mult * (
-                    -1 if parent_node.left is new_node else 1
-                ), parent_node.dest_position[1] + new_node.radius * 3
-            )
+    def on_insert(self, node):
+        self.layout.insert(self, node)
+        if self.batch_depth:
+            self.batch_inserted[node] = None
+            return
 
-            anim_bundle = [(
-                Operation.INSERT, (new_node, new_node.dest_position), 50
-            )] + self.visualizer.edge_manager.edge_diffs_with_animations(self.get_edges_set())
-        else:
-            anim_bundle = [(
-                Operation.MOVE, (new_node, new_node.dest_position), 50
-            )]
+        moved = self.update_layout()
+        anim_bundle = [(
+            Operation.INSERT, (node, node.dest_position), 50
+        )] + [
+            (Operation.MOVE, (moved_node, moved_node.dest_position), 50)
+            for moved_node in moved if moved_node is not node
+        ] + self.edge_animations()
 
         self.visualizer.animation_controller.add_animated_element((
             Operation.BUNDLE, anim_bundle
         ))
 
-        self._insert_fixup(new_node)
-
-        self.collision_check()
-
-    def _insert_fixup(self, z):
-        while not z.parent.color:
-            # animations = [(Operation.HIGHLIGHT, z, 30)]
-            if z.parent is z.parent.parent.left:
-                y = z.parent.parent.right
-                if not y.color:
-                    z.parent.set_color(RbtColor.BLACK.value)
-                    y.set_color(RbtColor.BLACK.value)
-                    z.parent.parent.set_color(RbtColor.RED.value)
-                    z = z.parent.parent
-                else:
-                    if z is z.parent.right:
-                        z = z.parent
-                        self._left_rotate(z)
-                    z.parent.set_color(RbtColor.BLACK.value)
-                    z.parent.parent.set_color(RbtColor.RED.value)
-                    self._right_rotate(z.parent.parent)
-            elif z.parent is z.parent.parent.right:
-                y = z.parent.parent.left
-                if not y.color:
-                    z.parent.set_color(RbtColor.BLACK.value)
-                    y.set_color(RbtColor.BLACK.value)
-                    z.parent.parent.set_color(RbtColor.RED.value)
-                    z = z.parent.parent
-                else:
-                    if z is z.parent.left:
-                        z = z.parent
-                        self._right_rotate(z)
-                    z.parent.set_color(RbtColor.BLACK.value)
-                    z.parent.parent.set_color(RbtColor.RED.value)
-                    self._left_rotate(z.parent.parent)
-
-        self.root.set_color(RbtColor.BLACK.value)
-        self.visualizer.animation_controller.add_animated_element((Operation.CHANGE_COLOR, None, 20))
-
-    def insert_iterable(self, key_list):
-        for x in key_list:
-            self.insert(x)
-
-    def _transplant(self, x, y):
-        if x.parent is self.nil:
-            self.root = y
-        elif x is x.parent.left:
-            x.parent.left = y
-        else:
-            x.parent.right = y
-        y.parent = x.parent
-        y.subtree_size = (0 if y.left is self.nil else y.left.subtree_size) + (
-            0 if y.right is self.nil else y.right.subtree_size) + y.quantity
-
-        y.dest_position = x.dest_position
-        return Operation.MOVE, (y, y.dest_position), 50
-
+    def on_rotate(self, node):
+        self.layout.mark_dirty(node)
+        if not self.batch_depth:
+            self.reposition()
+            self.visualizer.animation_controller.add_animated_element((Operation.CHANGE_COLOR, None, 20))
 
-    def delete(self, node):
-        if node.quantity > 1:
-            node.quantity -= 1
-            self._subtree_size_decrease(node)
+    def on_recolor(self, node, old_color):
+        self.visualizer.node_changed(node)
+        if self.batch_depth:
+            self.batch_colors.setdefault(node, old_color)
             return
-        self.delete_all(node)
 
-    def delete_all(self, node):
+        self._start_color_change(node, old_color)
 
-        node_is_root = node is self.root
+    def _start_color_change(self, node, old_color):
+        if node.additional_circle_radius_mult < 1.0:
+            node.set_additional_circle(
+                1.0, Color.BLACK.value if old_color == RbtColor.BLACK.value else Color.RED.value
+            )
+        self.visualizer.animation_controller.node_update_set.add(node)
+
+    def on_fixup_end(self):
+        if not self.batch_depth:
+            self.visualizer.animation_controller.add_animated_element((Operation.CHANGE_COLOR, None, 20))
 
-        self.nodes_being_deleted.add(node)
+    def on_delete_begin(self, node):
         node.being_deleted = True
-        anim_bundle = []
-
-        self._subtree_size_decrease(node.parent, node.quantity)
-        y = node
-        y_og_color = y.color
-        if node.left is self.nil:
-            z = node.right
-            anim_bundle.append(self._transplant(node, node.right))
-        elif node.right is self.nil:
-            z = node.left
-            anim_bundle.append(self._transplant(node, node.left))
+        self.visualizer.node_changed(node)
+        if node in self.batch_inserted:
+            del self.batch_inserted[node]  # never shown, nothing to animate
+            self.visualizer.node_removed(node)
         else:
-            y = self.minimum(node.right)
-            y_og_color = y.color
-            z = y.right
+            self.nodes_being_deleted.add(node)
+            if self.batch_depth:
+                self.batch_deleted[node] = None
 
-            if y.parent is node:
-                z.parent = y
-            else:
-                anim_bundle.append(self._transplant(y, y.right))
-                y.right = node.right
-                y.right.parent = y
-            anim_bundle.append(self._transplant(node, y))
-            y.left = node.left
-            y.left.parent = y
-            y.set_color(node.color)
-            y.subtree_size = (0 if y.left is self.nil else y.left.subtree_size) + (
-                0 if y.right is self.nil else y.right.subtree_size) + y.quantity
-
-        if node_is_root:
-            node.dest_position = (self.base_position[0], int((-100 - self.visualizer.y_offset) * 10 * self.visualizer.zoom))
+    def on_transplant(self, x, y):
+        if y is not self.nil:
+            self.layout.mark_dirty(y)
+
+    def on_unlink(self, node):
+        self.layout.dirty.discard(node)
+        if node.parent is self.nil:
+            visualizer = self.visualizer
+            node.dest_position = (node.dest_position[0], int((-100 - visualizer.y_offset) * 10 * visualizer.zoom))
         else:
             node.dest_position = node.parent.dest_position
+        self.visualizer.node_changed(node)
+        if self.batch_depth:
+            return
 
+        anim_bundle = [
+            (Operation.MOVE, (moved_node, moved_node.dest_position), 50) for moved_node in self.update_layout()
+        ]
         anim_bundle.extend([(
             Operation.MOVE, (node, node.dest_position), 50
-        )] + self.visualizer.edge_manager.edge_diffs_with_animations(self.get_edges_set()))
+        )] + self.edge_animations())
 
         anim_bundle.append((Operation.CHANGE_COLOR, None, 20))
 
@@ -448,151 +198,80 @@ class RedBlackVisualizedTree:
             Operation.BUNDLE, anim_bundle
         ))
 
-        if y_og_color:
-            self._delete_fixup(z)
-
-        self.collision_check()
-
-
-    def _delete_fixup(self, node):
-        while node is not self.root and node.color:
-            if node is node.parent.left:
-                sibling = node.parent.right
-                if not sibling.color:
-                    sibling.set_color(RbtColor.BLACK.value)
-                    sibling.parent.set_color(RbtColor.RED.value)
-                    self._left_rotate(node.parent)
-                    sibling = node.parent.right
-                if sibling is self.nil or (sibling.left.color and sibling.right.color):
-                    if sibling is not self.nil:
-                        sibling.set_color(RbtColor.RED.value)
-                    node = node.parent
-                else:
-                    if not sibling.left.color:
-                        sibling.left.set_color(RbtColor.BLACK.value)
-                        sibling.set_color(RbtColor.RED.value)
-                        self._right_rotate(sibling)
-                        sibling = node.parent.right
-                    sibling.set_color(node.parent.color)
-                    node.parent.set_color(RbtColor.BLACK.value)
-                    sibling.right.set_color(RbtColor.BLACK.value)
-
-                    self._left_rotate(node.parent)
-                    node = self.root
-            else:
-                sibling = node.parent.left
-                if not sibling.color:
-                    sibling.set_color(RbtColor.BLACK.value)
-                    sibling.parent.set_color(RbtColor.RED.value)
-                    self._right_rotate(node.parent)
-                    sibling = node.parent.left
-                if sibling is self.nil or (sibling.right.color and sibling.left.color):
-                    if sibling is not self.nil:
-                        sibling.set_color(RbtColor.RED.value)
-                    node = node.parent
-                else:
-                    if not sibling.right.color:
-                        sibling.right.set_color(RbtColor.BLACK.value)
-                        sibling.set_color(RbtColor.RED.value)
-                        self._left_rotate(sibling)
-                        sibling = node.parent.left
-                    sibling.set_color(node.parent.color)
-                    node.parent.set_color(RbtColor.BLACK.value)
-                    sibling.left.set_color(RbtColor.BLACK.value)
-
-                    self._right_rotate(node.parent)
-                    node = self.root
-        node.set_color(RbtColor.BLACK.value)
+    def on_bulk_load(self, nodes):
+        for node in nodes:  # nodes dropped before can come back with an undo
+            node.being_deleted = False
+            self.nodes_being_deleted.discard(node)
+        if self.batch_depth:
+            self.batch_inserted.update(dict.fromkeys(nodes))
+            self.batch_full_layout = True
+            return
+
+        new_nodes = set(nodes)
+        moved = self.update_layout(full=True)
+        self.visualizer.edge_manager.sync(self.get_edges_set())
+        anim_bundle = [(Operation.INSERT, (node, node.dest_position), 50) for node in nodes] + [
+            (Operation.MOVE, (node, node.dest_position), 50) for node in moved if node not in new_nodes
+        ] + self.edge_animations(50)
+
         self.visualizer.animation_controller.add_animated_element((
-            Operation.CHANGE_COLOR, None, 20
+            Operation.BUNDLE, anim_bundle
         ))
 
-    def _subtree_size_decrease(self, node, val=1):
-        while node is not self.nil:
-            node.subtree_size -= val
-            node = node.parent
+    def on_clear(self, nodes):
+        # Whatever is still animated goes to its end first, the dropped nodes are not drawn from here on and their
+        # edges shrink away when the edges are synced with the rebuilt tree
+        self.visualizer.animation_controller.fast_forward()
+        for node in nodes:
+            node.being_deleted = True
+            self.nodes_being_deleted.discard(node)
+            self.layout.dirty.discard(node)
+            self.batch_inserted.pop(node, None)
+            self.batch_deleted.pop(node, None)
+            self.batch_colors.pop(node, None)
+            self.visualizer.node_removed(node)
+        if self.batch_depth:
+            self.batch_full_layout = True
+
+    def on_operation_end(self):
+        if not self.batch_depth:
+            self.reposition()
+
+    def on_batch_begin(self):
+        self.batch_depth += 1
+
+    def on_batch_end(self):
+        self.batch_depth -= 1
+        if self.batch_depth:
+            return
 
-    def delete_by_value(self, value):
-        node = self.search(value)
-        if node is self.nil:
-            raise ValueError('Value not in the structure')
+        if self.batch_full_layout:
+            moved = self.update_layout(full=True)
+            self.visualizer.edge_manager.sync(self.get_edges_set())
         else:
-            self.delete(node)
+            moved = self.update_layout()
+
+        inserted, deleted = self.batch_inserted, self.batch_deleted
+        for node, old_color in self.batch_colors.items():
+            if node.color != old_color and not node.being_deleted and node not in inserted:
+                self._start_color_change(node, old_color)
+
+        anim_bundle = [(Operation.INSERT, (node, node.dest_position), 50) for node in inserted] + [
+            (Operation.MOVE, (node, node.dest_position), 50)
+            for node in moved if node not in inserted and not node.being_deleted
+        ] + [
+            (Operation.MOVE, (node, node.dest_position), 50) for node in deleted
+        ] + self.edge_animations(50)
+        anim_bundle.append((Operation.CHANGE_COLOR, None, 20))
 
-    def delete_all_by_value(self, value):
-        node = self.search(value)
-        if node is self.nil:
-            raise ValueError('Value not in the structure')
-        else:
-            self.delete_all(node)
-
-    def lower_bound(self, key):
-        node = self.root
-        candidate = self.nil
-        while node is not self.nil:
-            if self.comparator_func(key, node.value):
-                node = node.right
-            else:
-                if candidate is self.nil or self.comparator_func(candidate.value, node.value):
-                    candidate = node
-                node = node.left
-
-        return candidate
-
-    def upper_bound(self, key):
-        node = self.root
-        candidate = self.nil
-        while node is not self.nil:
-            if self.comparator_func(node.value, key):
-                if candidate is self.nil or self.comparator_func(candidate.value, node.value):
-                    candidate = node
-                node = node.left
-            else:
-                node = node.right
-
-        return candidate
-
-    def find_by_rank(self, node, i):
-        if not (1 <= i <= len(self)):
-            raise IndexError("Invalid index")
-        r = node.left.subtree_size + 1
-        if r <= i < r + node.quantity:
-            return node
-        return self.find_by_rank(node.left, i) if i < r else self.find_by_rank(node.right, i - r - node.quantity + 1)
-
-    def get_rank(self, node):
-        if node is self.nil:
-            raise ValueError("Node not found in the container")
-        r = node.left.subtree_size + 1
-        while node is not self.root:
-            if node is node.parent.right:
-                r += node.parent.left.subtree_size + node.parent.quantity
-            node = node.parent
-        return r
-
-    def get_rank_range(self, node):  # right-side exclusive
-        r = self.get_rank(node)
-        return r, r + node.quantity
-
-    def get_rank_by_value(self, val):
-        node = self.search(val)
-        if node is self.nil:
-            raise ValueError("Node not found in the container")
-        return self.get_rank(node)
-
-    def get_rank_range_by_value(self, val):  # right-side exclusive
-        node = self.search(val)
-        if node is self.nil:
-            raise ValueError("Node not found in the container")
-        return self.get_rank_range(node)
-
-    def _set_value(self, key, value, new_quantity=1):  # potentially dangerous
-        if key in self:
-            node = self.search(key)
-            node.value = value
-            prev_quantity = node.quantity
-            node.quantity = new_quantity
-            self._subtree_size_decrease(node, prev_quantity - node.quantity)
+        self.batch_inserted = dict()
+        self.batch_deleted = dict()
+        self.batch_colors = dict()
+        self.batch_full_layout = False
+
+        self.visualizer.animation_controller.add_animated_element((
+            Operation.BUNDLE, anim_bundle
+        ))
 
     def update(self):
         to_be_removed = set()
@@ -601,3 +280,5 @@ class RedBlackVisualizedTree:
                 to_be_removed.add(node)
 
         self.nodes_being_deleted.difference_update(to_be_removed)
+        for node in to_be_removed:
+            self.visualizer.node_removed(node)
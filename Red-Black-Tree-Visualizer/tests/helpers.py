@@ -0,0 +1,24 @@
+def shape(tree):  # preorder of (value, quantity, color, subtree_size) with None for nil, equal only for equal trees
+    __tracebackhide__ = True  # pytest would hang printing a tree with a cycle as an argument
+    nil = tree.nil
+    records = []
+    stack = [tree.root]
+    limit = 2 * tree.root.subtree_size + 1  # a tree whose links make a cycle fails instead of hanging
+    while stack:
+        assert len(records) <= limit, 'the tree links make a cycle'
+        node = stack.pop()
+        if node is nil:
+            records.append(None)
+            continue
+        records.append((node.value, node.quantity, node.color, node.subtree_size))
+        stack.append(node.right)
+        stack.append(node.left)
+    return records
+
+
+def random_operations(tree, rng, count, keys=500):
+    for _ in range(count):
+        if len(tree) and rng.random() < 0.3:
+            tree.delete_by_value(rng.choice(tree.get_nodes()).value)
+        else:
+            tree.insert(rng.randrange(keys))
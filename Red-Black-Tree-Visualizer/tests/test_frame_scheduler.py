@@ -0,0 +1,34 @@
+from types import SimpleNamespace
+
+from controllers.FrameScheduler import FrameScheduler
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_late_frame_is_not_followed_by_a_burst():
+    clock = Clock()
+    scheduler = FrameScheduler(SimpleNamespace(fps_max=100, tps_max=60), clock=clock)
+    assert scheduler.frame_due()
+    clock.now = 0.25  # a long stall, many frames late
+    assert scheduler.frame_due()
+    assert not scheduler.frame_due()
+    clock.now = 0.255
+    assert not scheduler.frame_due()
+    clock.now = 0.26
+    assert scheduler.frame_due()
+
+
+def test_frames_on_time_keep_to_the_frame_rate():
+    clock = Clock()
+    scheduler = FrameScheduler(SimpleNamespace(fps_max=100, tps_max=60), clock=clock)
+    frames = 0
+    for i in range(1000):  # a frame is noticed up to 3 ms after it is due, the rate still averages out
+        clock.now = i * 0.003
+        frames += scheduler.frame_due()
+    assert frames == 300
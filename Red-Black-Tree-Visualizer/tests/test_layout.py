@@ -0,0 +1,21 @@
+import pytest
+
+
+@pytest.mark.parametrize('keys', [range(60), range(59, -1, -1)])
+def test_incremental_layout_keeps_the_root_at_the_base_position(visualizer, keys):
+    visualizer.restart()
+    visualizer.tree.insert_iterable(keys)
+    assert visualizer.tree.root.dest_position[0] == visualizer.tree.base_position[0]
+    visualizer.tree.reposition(full=True)
+    assert visualizer.tree.root.dest_position[0] == visualizer.tree.base_position[0]
+
+
+def test_duplicates_do_not_make_collapsed_subtrees_taller(visualizer):
+    visualizer.restart()
+    tree = visualizer.tree
+    tree.bulk_load([value for value in range(15) for _ in range(1000)])
+    visualizer.animation_controller.fast_forward()
+    subtrees = tree.get_subtrees((-10 ** 6, -10 ** 6, 10 ** 6, 10 ** 6), 10 ** 6)
+    assert [node for node, _ in subtrees] == [tree.root]
+    _, y, _, bottom = subtrees[0][1]
+    assert bottom - y <= 5 * tree.layout.y_step  # about 15 nodes, not 15000 at 14 levels
@@ -0,0 +1,56 @@
+import random
+
+import pytest
+
+from rbt.RbtTimeline import Timeline
+from rbt.RedBlackTree import RedBlackTree
+from tests.helpers import random_operations, shape
+
+
+def test_undo_and_redo_a_clear():
+    tree = RedBlackTree()
+    timeline = Timeline(tree, keyframe_interval=50)
+    random_operations(tree, random.Random(0), 120)
+    before = shape(tree)
+    operations = len(timeline)
+
+    tree.clear()
+    assert len(timeline) == operations + 1
+    assert shape(tree) == shape(RedBlackTree())
+
+    timeline.undo()
+    assert shape(tree) == before
+    timeline.redo()
+    assert len(tree) == 0 and tree.root is tree.nil
+
+    timeline.undo()
+    tree.insert(-1)  # the tree goes on from the restored nodes, the clear can not be redone any more
+    assert len(timeline) == operations + 1
+    assert [node.value for node in tree] == sorted([-1] + [node.value for node in tree if node.value != -1])
+
+
+def test_undo_a_delete_whose_fixup_rotates_off_the_path():
+    tree = RedBlackTree()
+    timeline = Timeline(tree)
+    tree.insert_iterable([3, 3, 5, 4, 0])
+    before = shape(tree)
+    tree.delete_by_value(5)
+    timeline.undo()
+    assert shape(tree) == before
+    assert all(child.parent is node for node in tree for child in (node.left, node.right) if child is not tree.nil)
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_seek_to_every_position(seed):
+    rng = random.Random(seed)
+    tree = RedBlackTree()
+    timeline = Timeline(tree, keyframe_interval=25)
+    shapes = [shape(tree)]
+    for _ in range(200):
+        random_operations(tree, rng, 1, keys=20)
+        shapes.append(shape(tree))
+    positions = list(range(len(shapes)))
+    rng.shuffle(positions)
+    for position in positions:
+        timeline.seek(position)
+        assert shape(tree) == shapes[position]
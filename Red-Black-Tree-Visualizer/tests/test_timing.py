@@ -0,0 +1,26 @@
+import random
+
+import pytest
+
+
+def play(visualizer, tps_max):  # seconds of animation for the same operations, and the settled node positions
+    visualizer.restart()
+    visualizer.tps_max = tps_max
+    keys = random.Random(0).sample(range(1000), 20)
+    visualizer.tree.insert_iterable(keys)
+    for key in keys[:5]:
+        visualizer.tree.delete_by_value(key)
+    ticks = 0
+    while not visualizer.animation_controller.idle():
+        visualizer.tick()
+        ticks += 1
+    for _ in range(int(tps_max)):
+        visualizer.tick()
+    return ticks / tps_max, [(node.value, node.position) for node in visualizer.tree]
+
+
+def test_animations_take_the_same_time_at_any_tick_rate(visualizer):
+    seconds_60, positions_60 = play(visualizer, 60.0)
+    seconds_144, positions_144 = play(visualizer, 144.0)
+    assert seconds_144 == pytest.approx(seconds_60, rel=0.02)  # starts fall on whole ticks
+    assert positions_144 == positions_60
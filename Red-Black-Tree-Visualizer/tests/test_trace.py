@@ -0,0 +1,82 @@
+import random
+
+import pytest
+
+from rbt.RbtTrace import TracePlayer, TraceRecorder
+from rbt.RedBlackTree import RedBlackTree
+from tests.helpers import random_operations, shape
+
+
+def record(steps):
+    recorder = TraceRecorder()
+    tree = RedBlackTree(observer=recorder)
+    shapes = [shape(tree)]
+    for step in steps:
+        step(tree)
+        shapes.append(shape(tree))
+    return recorder.getvalue(), shapes
+
+
+def test_replay_matches_every_operation():
+    rng = random.Random(0)
+    data, shapes = record([lambda tree: random_operations(tree, rng, 1)] * 500)
+    player = TracePlayer(data, RedBlackTree())
+    for expected in shapes[1:]:
+        assert player.step()
+        assert shape(player.tree) == expected
+    assert not player.step()
+
+
+def test_bulk_load_of_values_already_in_the_tree():
+    rng = random.Random(1)
+    steps = [
+        lambda tree: random_operations(tree, rng, 60, keys=50),
+        lambda tree: tree.bulk_load([node.value for node in tree.get_nodes()[::3]]),
+        lambda tree: random_operations(tree, rng, 60, keys=50),
+    ]
+    data, shapes = record(steps)
+    player = TracePlayer(data, RedBlackTree())
+    player.play()
+    assert shape(player.tree) == shapes[-1]
+
+
+def test_clear():
+    rng = random.Random(3)
+    steps = [lambda tree: random_operations(tree, rng, 1)] * 40 + [lambda tree: tree.clear()]
+    data, shapes = record(steps * 2)
+    player = TracePlayer(data, RedBlackTree(), snapshot_interval=30)
+    for expected in shapes[1:]:
+        assert player.step()
+        assert shape(player.tree) == expected
+    for position in (40, 41, 70, 0, 81):
+        player.seek(position)
+        assert shape(player.tree) == shapes[position]
+
+
+def test_seek_back_and_forth():
+    rng = random.Random(2)
+    data, shapes = record([lambda tree: random_operations(tree, rng, 1)] * 300)
+    player = TracePlayer(data, RedBlackTree(), snapshot_interval=50)
+    for position in (300, 120, 0, 299, 51, 50, 200):
+        player.seek(position)
+        assert shape(player.tree) == shapes[position]
+
+
+@pytest.mark.parametrize('ticks', [0, 30])  # between operations
+def test_replay_into_a_visualized_tree(visualizer, ticks):
+    def steps(tree):
+        tree.insert_iterable([4, 1, 3])
+        tree.delete_by_value(3)
+        tree.clear()
+        tree.insert(7)
+
+    data, shapes = record([steps])
+    visualizer.restart()
+    player = TracePlayer(data, visualizer.tree)
+    while player.step():
+        for _ in range(ticks):
+            visualizer.tick()
+    while not visualizer.animation_controller.idle():
+        visualizer.tick()
+    assert shape(visualizer.tree) == shapes[-1]
+    assert len(visualizer.edge_manager.edges) == 0
@@ -0,0 +1,38 @@
+import pytest
+
+
+def settle(visualizer):
+    while not visualizer.animation_controller.idle():
+        visualizer.tick()
+    visualizer.tick()
+
+
+@pytest.mark.parametrize('ticks', [None, 0, 30])
+def test_clear(visualizer, ticks):  # after the animations end, right away, or in the middle of them
+    visualizer.restart()
+    tree = visualizer.tree
+    tree.insert_iterable([4, 1, 3])
+    tree.delete_all_by_value(3)
+    if ticks is None:
+        settle(visualizer)
+    else:
+        for _ in range(ticks):
+            visualizer.tick()
+    tree.clear()
+    settle(visualizer)
+    assert not visualizer.edge_manager.edges
+    assert not visualizer.node_index.query((-10 ** 6, -10 ** 6, 10 ** 6, 10 ** 6))
+    tree.insert(7)
+    settle(visualizer)
+    assert [node.value for node in tree] == [7]
+
+
+def test_edge_added_back_while_shrinking_grows_again(visualizer):
+    visualizer.restart()
+    tree = visualizer.tree
+    tree.insert_iterable([4, 1, 3])
+    tree.delete_by_value(3)  # 1-4 goes away in the rotation of the insert and comes back with the delete
+    settle(visualizer)
+    edges = visualizer.edge_manager.edges
+    assert sorted((node1.value, node2.value) for node1, node2 in edges) == [(1, 4)]
+    assert all(edge.length_multiplier == 1.0 for edge in edges.values())
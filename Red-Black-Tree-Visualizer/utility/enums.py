@@ -14,6 +14,14 @@ class Color(Enum):
     GREEN = (29, 46, 7)
     LIGHT_BLUE = (45, 111, 181)
     HIGHLIGHT_YELLOW = (222, 244, 64)
+    COLORKEY = (255, 0, 255)  # transparent background of opaque sprites, not used for drawing
+
+
+class Detail(Enum):  # levels of detail, from close up to far away
+    FULL = 0
+    SHAPES = 1  # nodes without their values
+    POINTS = 2  # nodes as points, edges as plain lines
+    SUBTREES = 3  # narrow subtrees collapsed into one glyph each
 
 
 class Operation(Enum):
@@ -27,3 +35,21 @@ class Operation(Enum):
     MOVE = 7
     CHANGE_COLOR = 8
     CHANGE_LEN = 9
+
+
+class TraceEvent(Enum):  # record kinds of a structural trace, the value is the opcode byte
+    VISIT = 0
+    INSERT_ROOT = 1
+    INSERT_LEFT = 2
+    INSERT_RIGHT = 3
+    QUANTITY = 4
+    ROTATE = 5  # the node goes up over its parent
+    RECOLOR_RED = 6
+    RECOLOR_BLACK = 7
+    DELETE = 8
+    FIXUP_END = 9
+    BULK_LOAD = 10
+    OPERATION_END = 11
+    BATCH_BEGIN = 12
+    BATCH_END = 13
+    CLEAR = 14
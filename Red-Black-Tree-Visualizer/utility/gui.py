@@ -1,28 +1,114 @@
 import pygame
 from pygame import Vector2
 
+from utility.cache import LruCache
 from utility.enums import Color
 
+try:
+    import numpy as np
+except ImportError:  # the batched line functions need NumPy, the single line ones work without it
+    np = None
 
-def drawTextWithOutline(visualizer, text, font_type, font_size, color, center_x, center_y, fitted_width=None):
-    for _ in range(3):
+
+# Fonts, finished outlined labels and node sprites, steady frames only blit surfaces from here
+font_cache = LruCache(64)
+text_cache = LruCache(4096)
+circle_cache = LruCache(1024)
+point_cache = LruCache(64)
+labeled_circle_cache = LruCache(4096)
+
+
+def getFont(font_type, font_size):
+    key = (font_type, font_size)
+    font = font_cache.get(key)
+    if font is None:
         font = pygame.font.SysFont(font_type, font_size)
+        font_cache.put(key, font)
+    return font
+
+
+def renderTextWithOutline(text, font_type, font_size, color, fitted_width=None, outline_thickness=1):
+    if fitted_width is not None:
+        fitted_width = int(fitted_width)
+    key = (text, font_type, font_size, color, fitted_width)
+    surface = text_cache.get(key)
+    if surface is not None:
+        return surface
+
+    for _ in range(3):
+        font = getFont(font_type, font_size)
         text_surface = font.render(text, True, color)
-        text_rect = text_surface.get_rect(center=(center_x, center_y))
-        if fitted_width is not None and text_rect.width > fitted_width:
-            font_size = int(font_size * fitted_width / text_rect.width)
+        if fitted_width is not None and text_surface.get_width() > fitted_width:
+            font_size = int(font_size * fitted_width / text_surface.get_width())
         else:
             break
 
     text_surface_outline = font.render(text, True, Color.OUTLINE_BLACK.value)
-    text_rect_outline = text_surface_outline.get_rect(center=(center_x, center_y))
-
-    outline_thickness = 1
+    surface = pygame.Surface((text_surface.get_width() + 2 * outline_thickness,
+                              text_surface.get_height() + 2 * outline_thickness), pygame.SRCALPHA)
     for dx in range(-outline_thickness, outline_thickness + 1):
         for dy in range(-outline_thickness, outline_thickness + 1):
-            visualizer.screen.blit(text_surface_outline, text_rect_outline.move(dx, dy))
+            surface.blit(text_surface_outline, (outline_thickness + dx, outline_thickness + dy))
+    surface.blit(text_surface, (outline_thickness, outline_thickness))
+
+    text_cache.put(key, surface)
+    return surface
+
+
+def _circleSurface(color, radius):
+    # pygame.draw.circle is not antialiased, so a colorkey keeps the exact pixels and RLE makes blits cheap
+    surface = pygame.Surface((2 * radius, 2 * radius))
+    surface.fill(Color.COLORKEY.value)
+    pygame.draw.circle(surface, color, (radius, radius), radius)
+    return surface
+
+
+def renderCircle(color, radius):  # same pixels as pygame.draw.circle centered at (radius, radius)
+    key = (color, radius)
+    surface = circle_cache.get(key)
+    if surface is None:
+        surface = _circleSurface(color, radius)
+        surface.set_colorkey(Color.COLORKEY.value, pygame.RLEACCEL)
+        circle_cache.put(key, surface)
+    return surface
+
+
+def renderPoint(color, size):
+    key = (color, size)
+    surface = point_cache.get(key)
+    if surface is None:
+        surface = pygame.Surface((size, size))
+        surface.fill(color)
+        point_cache.put(key, surface)
+    return surface
+
+
+def renderLabeledCircle(color, radius, text, font_type, font_size, font_color, fitted_width=None):
+    # Circle with its centered label already blended in, False when the label does not fit inside the circle
+    key = (color, radius, text, font_type, font_size, font_color,
+           None if fitted_width is None else int(fitted_width))
+    surface = labeled_circle_cache.get(key)
+    if surface is not None:
+        return surface
+
+    label = renderTextWithOutline(text, font_type, font_size, font_color, fitted_width)
+    label_position = label.get_rect(center=(radius, radius)).topleft
+    surface = _circleSurface(color, radius)
+    surface.set_colorkey(Color.COLORKEY.value)
+    label_mask = pygame.mask.from_surface(label, 0)
+    if pygame.mask.from_surface(surface).overlap_area(label_mask, label_position) == label_mask.count():
+        surface.blit(label, label_position)
+        surface.set_colorkey(Color.COLORKEY.value, pygame.RLEACCEL)
+    else:
+        surface = False
+
+    labeled_circle_cache.put(key, surface)
+    return surface
 
-    visualizer.screen.blit(text_surface, text_rect)
+
+def drawTextWithOutline(visualizer, text, font_type, font_size, color, center_x, center_y, fitted_width=None):
+    surface = renderTextWithOutline(text, font_type, font_size, color, fitted_width)
+    visualizer.screen.blit(surface, surface.get_rect(center=(center_x, center_y)))
 
 
 def drawAALine(visualizer, start_pos, end_pos, thickness=1.0):
@@ -54,6 +140,52 @@ def drawAALine(visualizer, start_pos, end_pos, thickness=1.0):
         pygame.draw.polygon(visualizer.screen, Color.OUTLINE_BLACK.value, points)
 
 
+def drawLine(visualizer, start_pos, end_pos):  # one pixel wide and not antialiased, for far zoom levels
+    pygame.draw.line(visualizer.screen, Color.OUTLINE_BLACK.value,
+                     ((start_pos[0] + visualizer.x_offset) * visualizer.zoom,
+                      (start_pos[1] + visualizer.y_offset) * visualizer.zoom),
+                     ((end_pos[0] + visualizer.x_offset) * visualizer.zoom,
+                      (end_pos[1] + visualizer.y_offset) * visualizer.zoom))
+
+
+def _screenSegments(visualizer, segments):
+    # World (n, 4) x1, y1, x2, y2 segments to screen coordinates, without empty ones and ones off the screen
+    segments = (segments + (visualizer.x_offset, visualizer.y_offset) * 2) * visualizer.zoom
+    x1, y1, x2, y2 = segments.T
+    width, height = visualizer.screen.get_size()
+    visible = ((x1 != x2) | (y1 != y2)) & (np.maximum(x1, x2) >= 0) & (np.minimum(x1, x2) <= width) \
+        & (np.maximum(y1, y2) >= 0) & (np.minimum(y1, y2) <= height)
+    return segments[visible]
+
+
+def drawAALines(visualizer, segments, thickness=1.0):
+    # drawAALine for every row of an (n, 4) array of world segments, all coordinates are computed in one pass
+    segments = _screenSegments(visualizer, segments)
+    if not len(segments):
+        return
+
+    screen, color = visualizer.screen, Color.OUTLINE_BLACK.value
+    thickness = max(1, int(thickness * visualizer.zoom))
+    if thickness == 1:
+        aaline = pygame.draw.aaline
+        for x1, y1, x2, y2 in segments.tolist():
+            aaline(screen, color, (x1, y1), (x2, y2))
+        return
+
+    starts, ends = segments[:, :2], segments[:, 2:]
+    direction = ends - starts
+    perp = direction[:, ::-1] * ((-thickness / 2.0, thickness / 2.0) / np.hypot(*direction.T)[:, None])
+    polygon = pygame.draw.polygon
+    for points in np.stack((starts + perp, starts - perp, ends - perp, ends + perp), axis=1).tolist():
+        polygon(screen, color, points)
+
+
+def drawLines(visualizer, segments):  # drawLine for every row of an (n, 4) array of world segments
+    screen, color, line = visualizer.screen, Color.OUTLINE_BLACK.value, pygame.draw.line
+    for x1, y1, x2, y2 in _screenSegments(visualizer, segments).tolist():
+        line(screen, color, (x1, y1), (x2, y2))
+
+
 class Button:
     def __init__(self, visualizer, x, y, w, h, text, font, font_size, color, font_color):
         self.visualizer = visualizer